@@ -0,0 +1,207 @@
+import asyncio
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, Http404
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from bank.exports import TransactionExport
+from bank.models import Account, Transaction
+from bank.serializers import AccountValuesSerializer, \
+    TransactionValuesSerializer
+from bank.views import AccountViewSet, TransactionViewSet
+from common.endpoints import EndPoints
+from services import async_rabbit_mq
+from settings import settings
+
+
+class AsyncViewSetMixin:
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return update_wrapper(async_view, view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        # sync_to_async copies the context, so reads in the sync thread
+        # follow the replica routing as well.
+        with self.replica_reads(request):
+            return await self.dispatch_async(request, *args, **kwargs)
+
+    async def dispatch_async(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.initial_async(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            # Write paths stay synchronous and run in the sync thread, the
+            # auth context resolved above is reused there without a new RPC.
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(
+                    request, *args, **kwargs
+                )
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+    async def initial_async(self, request: Request, *args, **kwargs) -> None:
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await sync_to_async(self.perform_authentication)(request)
+        await self.check_permissions_async(request)
+        self.check_throttles(request)
+
+    async def check_permissions_async(self, request: Request) -> None:
+        for permission in self.get_permissions():
+            if hasattr(permission, 'has_permission_async'):
+                has_permission = await permission.has_permission_async(
+                    request, self
+                )
+            else:
+                has_permission = await sync_to_async(
+                    permission.has_permission
+                )(request, self)
+
+            if not has_permission:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def aget_object(self):
+        owned_object = getattr(self.request, 'owned_object', None)
+        if isinstance(owned_object, self.queryset.model):
+            self.check_object_permissions(self.request, owned_object)
+            return owned_object
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (
+            queryset.model.DoesNotExist, TypeError, ValueError, ValidationError
+        ):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncTransactionViewSet(AsyncViewSetMixin, TransactionViewSet):
+
+    async def check_permissions_async(self, request: Request) -> None:
+        await super().check_permissions_async(request)
+        await sync_to_async(self.replay)(request)
+
+    @async_rabbit_mq.query(EndPoints.GET_USER)
+    async def list(self, request, *args, **kwargs):
+        if not kwargs:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        is_super_permission = kwargs['is_super_permission']
+        if is_super_permission:
+            user_transactions = Transaction.objects.all()
+        else:
+            user_id = int(kwargs['user_id'])
+            account_ids = [
+                account_id async for account_id in
+                Account.objects.filter(user_id=user_id)
+                .values_list('pk', flat=True)
+            ]
+            user_transactions = Transaction.objects.history(account_ids)
+        page = await sync_to_async(self.paginate_queryset)(
+            user_transactions.values(*TransactionValuesSerializer.fields)
+        )
+        serializer = TransactionValuesSerializer(
+            page, self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    @staticmethod
+    def export_response(
+        export: TransactionExport, output: str
+    ) -> FileResponse:
+        # Under ASGI Django 4.1 iterates streaming responses in the event
+        # loop, where the ORM refuses to run. The export is spooled here in
+        # the sync thread and only the file is streamed from the loop.
+        return FileResponse(
+            export.spool(output, settings.export_spool_max_size),
+            as_attachment=True,
+            filename=f'transactions.{output}',
+            content_type=TransactionExport.content_types[output]
+        )
+
+
+class AsyncAccountViewSet(AsyncViewSetMixin, AccountViewSet):
+
+    @async_rabbit_mq.query(EndPoints.GET_USER)
+    async def list(self, request, *args, **kwargs):
+        if not kwargs:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        is_super_permission = kwargs['is_super_permission']
+        if is_super_permission:
+            user_accounts = Account.objects.with_balance()
+        else:
+            user_accounts = Account.objects.with_balance().filter(
+                user_id=kwargs['user_id']
+            )
+        rows = [
+            row async for row in
+            user_accounts.order_by('pk')
+            .values(*AccountValuesSerializer.fields)
+        ]
+        transaction_ids = await sync_to_async(Account.recent_transaction_ids)(
+            [row['id'] for row in rows], settings.account_transactions_limit
+        )
+        serializer = AccountValuesSerializer(
+            rows, transaction_ids, self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        # The serializer runs in the event loop, where it may not query.
+        await sync_to_async(Account.prefetch_transactions)(
+            [instance], settings.account_transactions_limit
+        )
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
@@ -0,0 +1,78 @@
+from django.db.models import F
+from django.db.transaction import atomic
+
+from bank.models import Account, AccountBalanceShard
+
+
+class BalanceShards:
+
+    @classmethod
+    @atomic()
+    def configure(cls, account_id: int, count: int) -> bool:
+        if not Account.objects.filter(pk=account_id).update(
+            shard_count=count
+        ):
+            return False
+
+        AccountBalanceShard.objects.bulk_create(
+            [
+                AccountBalanceShard(account_id_id=account_id, shard=shard)
+                for shard in range(count)
+            ],
+            ignore_conflicts=True
+        )
+        cls.consolidate(account_id)
+        AccountBalanceShard.objects.filter(
+            account_id=account_id, shard__gte=count, balance=0
+        ).delete()
+        return True
+
+    @staticmethod
+    def credit(account_id: int, amount: int) -> bool:
+        shards = AccountBalanceShard.objects.filter(account_id=account_id)
+        # Any shard nobody else is crediting right now, so concurrent
+        # transfers into a hot account do not queue on a single row.
+        shard_id = shards.select_for_update(skip_locked=True).order_by(
+            '?'
+        ).values_list('pk', flat=True).first()
+        if shard_id is None:
+            shard_id = shards.select_for_update().order_by(
+                '?'
+            ).values_list('pk', flat=True).first()
+        if shard_id is None:
+            return bool(Account.objects.filter(pk=account_id).update(
+                balance=F('balance') + amount
+            ))
+
+        AccountBalanceShard.objects.filter(pk=shard_id).update(
+            balance=F('balance') + amount
+        )
+        return True
+
+    @staticmethod
+    @atomic()
+    def consolidate(account_id: int) -> int:
+        locked = Account.objects.select_for_update().filter(
+            pk=account_id
+        ).values_list('pk', flat=True)
+        if not list(locked):
+            return 0
+
+        # Shards locked by in-flight credits are left for the next run.
+        shards = list(
+            AccountBalanceShard.objects.select_for_update(skip_locked=True)
+            .filter(account_id=account_id)
+            .exclude(balance=0)
+            .values_list('pk', 'balance')
+        )
+        if not shards:
+            return 0
+
+        total = sum(balance for _, balance in shards)
+        AccountBalanceShard.objects.filter(
+            pk__in=[pk for pk, _ in shards]
+        ).update(balance=0)
+        Account.objects.filter(pk=account_id).update(
+            balance=F('balance') + total
+        )
+        return total
@@ -0,0 +1,37 @@
+import statistics
+
+
+class LatencyReport:
+
+    @staticmethod
+    def percentiles(samples: list[float]) -> list[float]:
+        if len(samples) < 2:
+            return list(samples) * 99
+        # The samples are the whole population, the default exclusive
+        # method extrapolates the tail past the slowest sample.
+        return statistics.quantiles(samples, n=100, method='inclusive')
+
+    @classmethod
+    def columns(
+        cls,
+        samples: list[float],
+        errors: int,
+        elapsed: float,
+        precision: int = 3
+    ) -> str:
+        if not samples:
+            return f'{0:>7}{errors:>8}'
+
+        milliseconds = sorted(sample * 1000 for sample in samples)
+        percentiles = cls.percentiles(milliseconds)
+        latencies = (
+            statistics.fmean(milliseconds),
+            percentiles[49],
+            percentiles[89],
+            percentiles[98],
+            milliseconds[-1]
+        )
+        return (
+            f'{len(samples):>7}{errors:>8}{len(samples) / elapsed:>10.0f}'
+            + ''.join(f'{latency:>9.{precision}f}' for latency in latencies)
+        )
@@ -0,0 +1,74 @@
+import csv
+import json
+import tempfile
+from datetime import datetime
+from typing import Iterator
+
+from rest_framework import serializers
+
+from bank.models import Transaction
+
+
+class Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+class TransactionExport:
+    fields = ['id', 'sender_id', 'recipient_id', 'amount', 'timestamp']
+    content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv'
+    }
+
+    def __init__(
+        self,
+        account_ids: list[int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        chunk_size: int = 2000
+    ) -> None:
+        if account_ids is None:
+            queryset = Transaction.objects.all()
+        else:
+            queryset = Transaction.objects.for_accounts(account_ids)
+        if since is not None:
+            queryset = queryset.filter(timestamp__gte=since)
+        if until is not None:
+            queryset = queryset.filter(timestamp__lt=until)
+
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.timestamp = serializers.DateTimeField().to_representation
+
+    def rows(self) -> Iterator[tuple]:
+        # values_list().iterator() keeps a server-side cursor open on
+        # PostgreSQL, so memory stays flat whatever the result size.
+        rows = self.queryset.order_by('timestamp', 'id').values_list(
+            *self.fields
+        ).iterator(chunk_size=self.chunk_size)
+        for *values, timestamp in rows:
+            yield *values, self.timestamp(timestamp)
+
+    def ndjson(self) -> Iterator[str]:
+        for row in self.rows():
+            yield json.dumps(dict(zip(self.fields, row))) + '\n'
+
+    def csv(self) -> Iterator[str]:
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.fields)
+        for row in self.rows():
+            yield writer.writerow(row)
+
+    def stream(self, output: str) -> Iterator[str]:
+        return getattr(self, output)()
+
+    def spool(
+        self, output: str, max_size: int
+    ) -> tempfile.SpooledTemporaryFile:
+        # Rows stay in memory up to max_size bytes, then move to disk.
+        file = tempfile.SpooledTemporaryFile(max_size)
+        for part in self.stream(output):
+            file.write(part.encode())
+        file.seek(0)
+        return file
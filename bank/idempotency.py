@@ -0,0 +1,217 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import wraps
+from typing import Callable
+
+from django.db import IntegrityError
+from django.db.models import Q
+from django.db.transaction import atomic, on_commit
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from bank.models import IdempotencyKey
+from settings import settings
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = 422
+    default_detail = 'Idempotency key was already used for another request.'
+    default_code = 'idempotency_key_reused'
+
+
+class IdempotencyKeyInUse(APIException):
+    status_code = 409
+    default_detail = 'A request with this idempotency key is in progress.'
+    default_code = 'idempotency_key_in_use'
+
+
+class IdempotentReplay(Exception):
+    def __init__(self, response: Response) -> None:
+        super().__init__()
+        self.response = response
+
+
+class ResponseCache:
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.__entries: OrderedDict[str, tuple[float, IdempotencyKey]] = (
+            OrderedDict()
+        )
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def entry_key(user_id: int, key: str) -> str:
+        return f'{user_id}:{key}'
+
+    def get(self, user_id: int, key: str) -> IdempotencyKey | None:
+        key = self.entry_key(user_id, key)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, idempotency_key = entry
+            if expires_at <= time.time():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return idempotency_key
+
+    def set(self, idempotency_key: IdempotencyKey) -> None:
+        key = self.entry_key(idempotency_key.user_id, idempotency_key.key)
+        with self.__lock:
+            self.__entries[key] = (time.time() + self.ttl, idempotency_key)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+
+class Idempotency:
+    header = 'HTTP_IDEMPOTENCY_KEY'
+    cache = ResponseCache(
+        settings.idempotency_cache_size, settings.idempotency_cache_ttl
+    )
+
+    @classmethod
+    def key(cls, request: Request) -> str | None:
+        return request.META.get(cls.header) or None
+
+    @staticmethod
+    def user_id(request: Request) -> int:
+        # Keys are scoped per user, one user never sees another's replay.
+        return request.auth_context.user_id
+
+    @staticmethod
+    def fingerprint(request: Request) -> str:
+        fingerprint = getattr(request, 'idempotency_fingerprint', None)
+        if fingerprint is None:
+            # The parsed data, request.body refuses uploads above
+            # DATA_UPLOAD_MAX_MEMORY_SIZE.
+            digest = hashlib.sha256()
+            digest.update(f'{request.method} {request.path}\n'.encode())
+            digest.update(json.dumps(
+                request.data, sort_keys=True, separators=(',', ':')
+            ).encode())
+            fingerprint = request.idempotency_fingerprint = digest.hexdigest()
+        return fingerprint
+
+    @classmethod
+    def replay(cls, request: Request) -> None:
+        key = cls.key(request)
+        if key is None:
+            return
+
+        user_id = cls.user_id(request)
+        idempotency_key = cls.cache.get(user_id, key)
+        if idempotency_key is None:
+            idempotency_key = IdempotencyKey.objects.filter(
+                user_id=user_id,
+                key=key,
+                created__gte=timezone.now() - timedelta(
+                    seconds=settings.idempotency_ttl
+                )
+            ).first()
+        if idempotency_key is not None and idempotency_key.is_complete:
+            cls.raise_replay(request, idempotency_key)
+
+    @classmethod
+    def claim(cls, request: Request, key: str) -> IdempotencyKey:
+        now = timezone.now()
+        user_keys = IdempotencyKey.objects.filter(
+            user_id=cls.user_id(request), key=key
+        )
+        # A pending key older than the lock timeout belongs to a request
+        # whose transaction rolled back, completion commits with the transfer.
+        user_keys.filter(
+            Q(created__lt=now - timedelta(seconds=settings.idempotency_ttl))
+            | Q(
+                status_code__isnull=True,
+                created__lt=now - timedelta(
+                    seconds=settings.idempotency_lock_timeout
+                )
+            )
+        ).delete()
+
+        fingerprint = cls.fingerprint(request)
+        try:
+            with atomic():
+                return IdempotencyKey.objects.create(
+                    user_id=cls.user_id(request),
+                    key=key,
+                    fingerprint=fingerprint
+                )
+        except IntegrityError:
+            pass
+
+        idempotency_key = user_keys.first()
+        if idempotency_key is None or not idempotency_key.is_complete:
+            raise IdempotencyKeyInUse()
+        cls.raise_replay(request, idempotency_key)
+
+    @classmethod
+    def complete(
+        cls, idempotency_key: IdempotencyKey, response: Response
+    ) -> None:
+        idempotency_key.status_code = response.status_code
+        idempotency_key.response = {
+            'data': response.data,
+            'location': response.get('Location')
+        }
+        idempotency_key.save(update_fields=['status_code', 'response'])
+        on_commit(lambda: cls.cache.set(idempotency_key))
+
+    @staticmethod
+    def release(idempotency_key: IdempotencyKey) -> None:
+        IdempotencyKey.objects.filter(
+            pk=idempotency_key.pk, status_code__isnull=True
+        ).delete()
+
+    @classmethod
+    def raise_replay(
+        cls, request: Request, idempotency_key: IdempotencyKey
+    ) -> None:
+        if idempotency_key.fingerprint != cls.fingerprint(request):
+            raise IdempotencyKeyReused()
+
+        headers = {'Idempotent-Replayed': 'true'}
+        location = idempotency_key.response.get('location')
+        if location is not None:
+            headers['Location'] = location
+        raise IdempotentReplay(Response(
+            idempotency_key.response['data'],
+            status=idempotency_key.status_code,
+            headers=headers
+        ))
+
+
+def idempotent(function: Callable) -> Callable:
+    @wraps(function)
+    def wrapper(view, request: Request, *args, **kwargs) -> Response:
+        key = Idempotency.key(request)
+        if key is None:
+            return function(view, request, *args, **kwargs)
+
+        idempotency_key = Idempotency.claim(request, key)
+        try:
+            # The key completes in the same transaction that moves money.
+            with atomic():
+                response = function(view, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    Idempotency.complete(idempotency_key, response)
+                    return response
+        except BaseException:
+            Idempotency.release(idempotency_key)
+            raise
+
+        Idempotency.release(idempotency_key)
+        return response
+
+    return wrapper
@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from django.db.models import Count, Max, Sum
+
+from bank.models import BalanceSnapshot, LedgerEntry, Transaction
+
+
+class Ledger:
+
+    @staticmethod
+    def record(transactions: list[Transaction]) -> None:
+        entries = []
+        for transaction in transactions:
+            entries.append(LedgerEntry(
+                account_id_id=transaction.sender_id_id,
+                transaction_id=transaction,
+                amount=-transaction.amount
+            ))
+            entries.append(LedgerEntry(
+                account_id_id=transaction.recipient_id_id,
+                transaction_id=transaction,
+                amount=transaction.amount
+            ))
+        LedgerEntry.objects.bulk_create(entries)
+
+    @staticmethod
+    def adjust(account_id: int, amount: int) -> LedgerEntry:
+        return LedgerEntry.objects.create(
+            account_id_id=account_id, amount=amount
+        )
+
+    @staticmethod
+    def balance_at(account_id: int, moment: datetime) -> int:
+        snapshot = BalanceSnapshot.objects.filter(
+            account_id_id=account_id, timestamp__lte=moment
+        ).order_by('-ledger_entry_id').first()
+
+        entries = LedgerEntry.objects.filter(
+            account_id_id=account_id, timestamp__lte=moment
+        )
+        balance = 0
+        if snapshot is not None:
+            balance = snapshot.balance
+            entries = entries.filter(id__gt=snapshot.ledger_entry_id_id)
+
+        total = entries.aggregate(total=Sum('amount'))['total']
+        return balance + (total or 0)
+
+    @classmethod
+    def statement(
+        cls, account_id: int, since: datetime, until: datetime
+    ) -> dict:
+        opening_balance = cls.balance_at(account_id, since)
+        entries = list(
+            LedgerEntry.objects.filter(
+                account_id_id=account_id,
+                timestamp__gt=since,
+                timestamp__lte=until
+            ).values('transaction_id', 'amount', 'timestamp')
+        )
+        closing_balance = opening_balance + sum(
+            entry['amount'] for entry in entries
+        )
+
+        return {
+            'account_id': account_id,
+            'since': since,
+            'until': until,
+            'opening_balance': opening_balance,
+            'closing_balance': closing_balance,
+            'entries': entries
+        }
+
+    @staticmethod
+    def snapshot(
+        account_id: int, cutoff: datetime, min_entries: int
+    ) -> BalanceSnapshot | None:
+        last_snapshot = BalanceSnapshot.objects.filter(
+            account_id_id=account_id
+        ).order_by('-ledger_entry_id').first()
+
+        entries = LedgerEntry.objects.filter(account_id_id=account_id)
+        balance = 0
+        if last_snapshot is not None:
+            balance = last_snapshot.balance
+            entries = entries.filter(id__gt=last_snapshot.ledger_entry_id_id)
+
+        last_id = entries.filter(timestamp__lte=cutoff).aggregate(
+            last_id=Max('id')
+        )['last_id']
+        if last_id is None:
+            return None
+
+        summary = entries.filter(id__lte=last_id).aggregate(
+            total=Sum('amount'), count=Count('id'), timestamp=Max('timestamp')
+        )
+        if summary['count'] < min_entries:
+            return None
+
+        return BalanceSnapshot.objects.create(
+            account_id_id=account_id,
+            ledger_entry_id_id=last_id,
+            balance=balance + summary['total'],
+            timestamp=summary['timestamp']
+        )
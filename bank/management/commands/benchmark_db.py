@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.utils import load_backend
+
+from bank.benchmarks import LatencyReport
+from settings import settings
+
+MODES = ('per_request', 'persistent', 'pooled')
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request database latency by connection strategy.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--mode',
+            action='append',
+            choices=MODES,
+            help='Connection strategy to measure, may be repeated. '
+                 'Defaults to all.'
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias whose settings are measured.'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Number of simulated requests per mode.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Concurrent request threads.'
+        )
+        parser.add_argument(
+            '--query',
+            default='SELECT 1',
+            help='Statement every simulated request runs.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.options = options
+        self.settings_dict = connections[options['database']].settings_dict
+
+        self.stdout.write(
+            f'{"mode":<13}{"ok":>7}{"errors":>8}{"rps":>10}'
+            f'{"mean":>9}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}'
+        )
+        for mode in options['mode'] or MODES:
+            settings_dict = self.mode_settings(mode)
+            if settings_dict is None:
+                self.stdout.write(f'{mode:<13}needs PostgreSQL, skipped')
+                continue
+            self.report(mode, *self.run(mode, settings_dict))
+
+    def mode_settings(self, mode: str) -> dict | None:
+        settings_dict = {**self.settings_dict, 'CONN_MAX_AGE': 0}
+        if mode == 'persistent':
+            settings_dict['CONN_MAX_AGE'] = max(
+                settings.sql_conn_max_age, 600
+            )
+        elif mode == 'pooled':
+            if connections[self.options['database']].vendor != 'postgresql':
+                return None
+            settings_dict.update({
+                'ENGINE': 'common.postgresql_pool',
+                'POOL_SIZE': self.options['concurrency'],
+                'POOL_TIMEOUT': settings.sql_pool_timeout
+            })
+        elif settings_dict['ENGINE'] == 'common.postgresql_pool':
+            settings_dict['ENGINE'] = 'django.db.backends.postgresql'
+        return settings_dict
+
+    def run(
+        self, mode: str, settings_dict: dict
+    ) -> tuple[list[float], int, float]:
+        backend = load_backend(settings_dict['ENGINE'])
+        local = threading.local()
+        wrappers: list[BaseDatabaseWrapper] = []
+        wrappers_lock = threading.Lock()
+
+        def simulated_request() -> float | None:
+            wrapper = getattr(local, 'wrapper', None)
+            if wrapper is None:
+                wrapper = local.wrapper = backend.DatabaseWrapper(
+                    settings_dict, alias=f'benchmark_{mode}'
+                )
+                # Closed from the main thread once the run is over.
+                wrapper.inc_thread_sharing()
+                with wrappers_lock:
+                    wrappers.append(wrapper)
+
+            started = time.perf_counter()
+            try:
+                # What the request_started and request_finished signals do.
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute(self.options['query'])
+                    cursor.fetchall()
+                wrapper.close_if_unusable_or_obsolete()
+            except Exception:
+                return None
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.options['concurrency']) as executor:
+            results = list(executor.map(
+                lambda _: simulated_request(), range(self.options['requests'])
+            ))
+        elapsed = time.perf_counter() - started
+
+        for wrapper in wrappers:
+            wrapper.close()
+        samples = [sample for sample in results if sample is not None]
+        return samples, len(results) - len(samples), elapsed
+
+    def report(
+        self, mode: str, samples: list[float], errors: int, elapsed: float
+    ) -> None:
+        self.stdout.write(
+            f'{mode:<13}'
+            f'{LatencyReport.columns(samples, errors, elapsed)}'
+        )
@@ -0,0 +1,196 @@
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Callable
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q, QuerySet
+
+from bank.benchmarks import LatencyReport
+from bank.models import Account, Transaction
+from bank.pagination import TransactionCursorPagination
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic transactions and compare the per-leg history pages '
+        'with the OR across both account joins, on the first page and deep '
+        'into the history. Writes benchmark accounts and their '
+        'transactions to the configured database.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--rows',
+            type=int,
+            action='append',
+            help='Transaction table size to measure at, may be repeated. '
+                 'Defaults to 1M, 10M and 50M rows.'
+        )
+        parser.add_argument(
+            '--accounts',
+            type=int,
+            default=10_000,
+            help='Benchmark accounts the transactions are spread over.'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=50,
+            help='Users whose history pages are timed per size.'
+        )
+        parser.add_argument(
+            '--user-offset',
+            type=int,
+            default=1_000_000_000,
+            help='First user id of the benchmark accounts.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Transactions inserted per statement while seeding.'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=TransactionCursorPagination.page_size,
+            help='Rows of the history page each query fetches.'
+        )
+        parser.add_argument(
+            '--depth',
+            type=float,
+            default=0.9,
+            help='Share of a user history before the deep page cursor.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.options = options
+        self.random = random.Random(0)
+        account_ids = self.seed_accounts()
+        user_ids = self.random.sample(
+            list(Account.objects.filter(pk__in=account_ids).values_list(
+                'user_id', flat=True
+            )),
+            min(options['users'], len(account_ids))
+        )
+
+        self.stdout.write(
+            f'{"rows":>10}{"page":>6}{"legs":>10}{"or":>10}'
+            f'{"legs p99":>11}{"or p99":>10}{"speedup":>9}'
+        )
+        for rows in sorted(options['rows'] or [
+            1_000_000, 10_000_000, 50_000_000
+        ]):
+            self.seed_transactions(account_ids, rows)
+            for page, positions in (
+                ('first', {user_id: None for user_id in user_ids}),
+                ('deep', self.deep_positions(user_ids))
+            ):
+                for user_id, position in positions.items():
+                    history = self.history_page(user_id, position)
+                    if history != self.or_page(user_id, position):
+                        raise CommandError(
+                            f'user {user_id}: {page} history page differs'
+                        )
+
+                legs = self.measure(self.history_page, positions)
+                or_ = self.measure(self.or_page, positions)
+                legs_mean = statistics.fmean(legs)
+                or_mean = statistics.fmean(or_)
+                self.stdout.write(
+                    f'{rows:>10}{page:>6}{legs_mean:>8.3f}ms'
+                    f'{or_mean:>8.3f}ms'
+                    f'{LatencyReport.percentiles(legs)[98]:>9.3f}ms'
+                    f'{LatencyReport.percentiles(or_)[98]:>8.3f}ms'
+                    f'{or_mean / legs_mean:>8.1f}x'
+                )
+
+    def seed_accounts(self) -> list[int]:
+        offset = self.options['user_offset']
+        user_ids = range(offset, offset + self.options['accounts'])
+        existing = set(Account.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', flat=True))
+        Account.objects.bulk_create(
+            [
+                Account(user_id=user_id, balance=0)
+                for user_id in user_ids if user_id not in existing
+            ],
+            batch_size=self.options['batch_size']
+        )
+        return list(Account.objects.filter(
+            user_id__in=user_ids
+        ).values_list('pk', flat=True))
+
+    def seed_transactions(self, account_ids: list[int], rows: int) -> None:
+        # Sizes are measured in ascending order, each one tops up the last.
+        missing = rows - Transaction.objects.count()
+        while missing > 0:
+            batch = min(missing, self.options['batch_size'])
+            Transaction.objects.bulk_create([
+                Transaction(
+                    sender_id_id=sender_id,
+                    recipient_id_id=recipient_id,
+                    amount=self.random.randint(1, 1000)
+                )
+                for sender_id, recipient_id in (
+                    self.random.sample(account_ids, 2) for _ in range(batch)
+                )
+            ])
+            missing -= batch
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE bank_transaction')
+
+    def deep_positions(self, user_ids: list[int]) -> dict[int, datetime]:
+        # The cursor a client holds after paging through most of the
+        # history, found once per size and left out of the timings.
+        positions = {}
+        for user_id in user_ids:
+            timestamps = self.user_transactions(user_id).order_by(
+                'timestamp', 'id'
+            ).values_list('timestamp', flat=True)
+            depth = int(timestamps.count() * self.options['depth'])
+            positions[user_id] = timestamps[depth] if depth else None
+        return positions
+
+    def history_page(
+        self, user_id: int, position: datetime | None
+    ) -> list[int]:
+        account_ids = list(
+            Account.objects.filter(user_id=user_id)
+            .values_list('pk', flat=True)
+        )
+        return self.page(Transaction.objects.history(account_ids), position)
+
+    def or_page(self, user_id: int, position: datetime | None) -> list[int]:
+        return self.page(self.user_transactions(user_id), position)
+
+    @staticmethod
+    def user_transactions(user_id: int) -> QuerySet:
+        return Transaction.objects.filter(
+            Q(sender_id__user_id=user_id) | Q(recipient_id__user_id=user_id)
+        )
+
+    def page(self, queryset, position: datetime | None) -> list[int]:
+        # The query CursorPagination runs for a page after the cursor.
+        if position is not None:
+            queryset = queryset.filter(timestamp__gt=position)
+        rows = queryset.order_by('timestamp', 'id').values('id', 'timestamp')
+        return [row['id'] for row in rows[:self.options['page_size']]]
+
+    @staticmethod
+    def measure(
+        query: Callable[[int, datetime | None], list[int]],
+        positions: dict[int, datetime | None]
+    ) -> list[float]:
+        samples = []
+        for user_id, position in positions.items():
+            started = time.perf_counter()
+            query(user_id, position)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
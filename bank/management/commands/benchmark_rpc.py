@@ -0,0 +1,254 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from django.core.management.base import BaseCommand
+from jose import jwt
+
+from bank.benchmarks import LatencyReport
+from common.actions import PermissionActions
+from common.endpoints import EndPoints
+from services import amqp_connection_string
+from services.async_rabbitmq_manager import AsyncRabbitMQ
+from services.auth_context import AuthContext
+from services.in_memory_transport import (
+    AsyncInMemoryTransport, FakeCoreService, InMemoryTransport
+)
+from services.jwt_manager import JWTManager
+from services.rabbitmq_manager import RabbitMQ
+from services.rpc_codec import CODECS, get_codec
+from services.rpc_policy import CircuitBreaker, RPCPolicy
+from settings import settings
+
+ENDPOINTS = {
+    'get_user': (EndPoints.GET_USER, {}),
+    'super_permission': (EndPoints.IS_SUPER_PERMISSION, {}),
+    'handler_action': (
+        EndPoints.VALIDATE_ACTION,
+        {'action': PermissionActions.VIEW_PROFILE}
+    ),
+    'auth_context': (
+        EndPoints.AUTH_CONTEXT,
+        {'actions': [PermissionActions.VIEW_PROFILE]}
+    )
+}
+MODES = ('sync', 'pooled', 'async')
+
+
+class Command(BaseCommand):
+    help = 'Measure core-service RPC latency and throughput per endpoint.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=[*ENDPOINTS, 'local_jwt'],
+            help='Endpoint to measure, may be repeated. Defaults to all.'
+        )
+        parser.add_argument(
+            '--mode',
+            action='append',
+            choices=MODES,
+            help='Client mode to measure, may be repeated. Defaults to all.'
+        )
+        parser.add_argument(
+            '--transport',
+            choices=('memory', 'amqp'),
+            default='memory',
+            help='Answer from the in-memory core service or a real broker.'
+        )
+        parser.add_argument(
+            '--codec',
+            choices=list(CODECS),
+            default=settings.rpc_codec,
+            help='Payload encoding of requests and in-memory replies.'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Number of calls per endpoint and mode.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Concurrent callers in pooled and async modes.'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0,
+            help='Simulated core-service latency in milliseconds.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.options = options
+        self.service = FakeCoreService(latency=options['latency'] / 1000)
+        self.headers = {'Authorization': f'Bearer {self.token()}'}
+        self.codec = get_codec(options['codec'])
+
+        self.stdout.write(
+            f'{"endpoint":<18}{"mode":<8}{"ok":>7}{"errors":>8}{"rps":>10}'
+            f'{"mean":>9}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}'
+            f'{"cpu":>9}'
+        )
+        for endpoint in options['endpoint'] or [*ENDPOINTS, 'local_jwt']:
+            for mode in options['mode'] or MODES:
+                self.report(endpoint, mode, *self.run(endpoint, mode))
+
+    def run(
+        self, endpoint: str, mode: str
+    ) -> tuple[list[float], int, float, float]:
+        requests = self.options['requests']
+        concurrency = 1 if mode == 'sync' else self.options['concurrency']
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        if mode == 'async':
+            samples, errors = asyncio.run(
+                self.run_async(endpoint, requests, concurrency)
+            )
+        else:
+            call = self.sync_call(endpoint, concurrency)
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(
+                    executor.map(lambda _: self.timed(call), range(requests))
+                )
+            samples = [elapsed for elapsed in results if elapsed is not None]
+            errors = len(results) - len(samples)
+        return (
+            samples,
+            errors,
+            time.perf_counter() - started,
+            time.process_time() - cpu_started
+        )
+
+    def sync_call(self, endpoint: str, pool_size: int) -> Callable[[], None]:
+        if endpoint == 'local_jwt':
+            return self.local_jwt
+
+        if self.options['transport'] == 'memory':
+            transport = InMemoryTransport(self.service, pool_size=pool_size)
+        else:
+            transport = None
+        client = RabbitMQ(
+            amqp_connection_string,
+            settings.core_channel_number,
+            pool_size=pool_size,
+            policy=self.policy(),
+            transport=transport,
+            codec=self.codec
+        )
+        routing_key, body = ENDPOINTS[endpoint]
+        body = self.codec.dumps(body)
+
+        def call() -> None:
+            status, answer = client.call(routing_key, body, self.headers)
+            if not status:
+                raise RuntimeError(answer)
+
+        return call
+
+    async def run_async(
+        self, endpoint: str, requests: int, concurrency: int
+    ) -> tuple[list[float], int]:
+        if endpoint == 'local_jwt':
+            async def call() -> None:
+                self.local_jwt()
+        else:
+            if self.options['transport'] == 'memory':
+                transport = AsyncInMemoryTransport(self.service)
+            else:
+                transport = None
+            client = AsyncRabbitMQ(
+                amqp_connection_string,
+                policy=self.policy(),
+                transport=transport,
+                codec=self.codec
+            )
+            routing_key, body = ENDPOINTS[endpoint]
+            body = self.codec.dumps(body)
+
+            async def call() -> None:
+                status, answer = await client.call(
+                    routing_key, body, self.headers
+                )
+                if not status:
+                    raise RuntimeError(answer)
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def timed() -> float | None:
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    await call()
+                except Exception:
+                    return None
+                return time.perf_counter() - started
+
+        results = await asyncio.gather(*(timed() for _ in range(requests)))
+        if endpoint != 'local_jwt':
+            await client.close()
+
+        samples = [elapsed for elapsed in results if elapsed is not None]
+        return samples, len(results) - len(samples)
+
+    def local_jwt(self) -> None:
+        claims = JWTManager.verify_token(self.headers['Authorization'])
+        auth_context = AuthContext.from_claims(
+            claims, [PermissionActions.VIEW_PROFILE]
+        )
+        if auth_context is None:
+            raise RuntimeError('Token does not carry an auth context.')
+
+    def report(
+        self,
+        endpoint: str,
+        mode: str,
+        samples: list[float],
+        errors: int,
+        elapsed: float,
+        cpu: float
+    ) -> None:
+        row = (
+            f'{endpoint:<18}{mode:<8}'
+            f'{LatencyReport.columns(samples, errors, elapsed)}'
+        )
+        if samples:
+            row += f'{cpu * 1000 / (len(samples) + errors):>9.3f}'
+        self.stdout.write(row)
+
+    @staticmethod
+    def timed(call: Callable[[], None]) -> float | None:
+        started = time.perf_counter()
+        try:
+            call()
+        except Exception:
+            return None
+        return time.perf_counter() - started
+
+    @staticmethod
+    def policy() -> RPCPolicy:
+        # A private breaker, a benchmark must not trip the service's one.
+        return RPCPolicy(
+            settings.rpc_timeout,
+            settings.rpc_timeouts,
+            settings.rpc_request_timeout,
+            CircuitBreaker(settings.rpc_failure_threshold)
+        )
+
+    @staticmethod
+    def token() -> str:
+        return jwt.encode(
+            {
+                'user_id': 1,
+                'is_super_permission': False,
+                'permissions': [PermissionActions.VIEW_PROFILE],
+                'exp': int(time.time()) + 3600
+            },
+            settings.jwt_secret_key,
+            algorithm=settings.jwt_algorithm
+        )
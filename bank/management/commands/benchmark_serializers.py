@@ -0,0 +1,137 @@
+import time
+from datetime import timedelta
+from typing import Callable
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from bank.models import Account, Transaction
+from bank.serializers import AccountSerializer, AccountValuesSerializer, \
+    TransactionSerializer, TransactionValuesSerializer
+from settings import settings
+
+
+class Command(BaseCommand):
+    help = 'Compare hyperlinked and values() serializers on in-memory rows.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--rows',
+            type=int,
+            action='append',
+            help='Number of rows to render, may be repeated. '
+                 'Defaults to 10000 and 100000.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        request = APIRequestFactory().get('/', HTTP_HOST='localhost')
+        context = {'request': Request(request)}
+        renderer = JSONRenderer()
+
+        self.stdout.write(
+            f'{"serializer":<14}{"rows":>8}{"hyperlinked":>14}'
+            f'{"values":>10}{"speedup":>9}'
+        )
+        for rows in options['rows'] or [10_000, 100_000]:
+            transactions, transaction_rows = self.transactions(rows)
+            self.compare(
+                'transactions',
+                rows,
+                lambda: renderer.render(TransactionSerializer(
+                    transactions, many=True, context=context
+                ).data),
+                lambda: renderer.render(TransactionValuesSerializer(
+                    transaction_rows, context
+                ).data)
+            )
+
+            accounts, account_rows, transaction_ids = self.accounts(rows)
+            self.compare(
+                'accounts',
+                rows,
+                lambda: renderer.render(AccountSerializer(
+                    accounts, many=True, context=context
+                ).data),
+                lambda: renderer.render(AccountValuesSerializer(
+                    account_rows, transaction_ids, context
+                ).data)
+            )
+
+    def compare(
+        self,
+        name: str,
+        rows: int,
+        hyperlinked: Callable[[], bytes],
+        values: Callable[[], bytes]
+    ) -> None:
+        hyperlinked_output, hyperlinked_time = self.timed(hyperlinked)
+        values_output, values_time = self.timed(values)
+        if hyperlinked_output != values_output:
+            raise CommandError(f'{name}: values() output differs')
+
+        self.stdout.write(
+            f'{name:<14}{rows:>8}{hyperlinked_time:>13.3f}s'
+            f'{values_time:>9.3f}s{hyperlinked_time / values_time:>8.1f}x'
+        )
+
+    @staticmethod
+    def timed(render: Callable[[], bytes]) -> tuple[bytes, float]:
+        started = time.perf_counter()
+        output = render()
+        return output, time.perf_counter() - started
+
+    @staticmethod
+    def transactions(rows: int) -> tuple[list[Transaction], list[dict]]:
+        now = timezone.now()
+        transactions = [
+            Transaction(
+                id=pk,
+                sender_id_id=pk % 97 + 1,
+                recipient_id_id=pk % 89 + 1,
+                amount=pk % 1000 + 1,
+                timestamp=now - timedelta(seconds=pk)
+            )
+            for pk in range(1, rows + 1)
+        ]
+        transaction_rows = [
+            {
+                'id': transaction.pk,
+                'sender_id': transaction.sender_id_id,
+                'recipient_id': transaction.recipient_id_id,
+                'amount': transaction.amount,
+                'timestamp': transaction.timestamp
+            }
+            for transaction in transactions
+        ]
+        return transactions, transaction_rows
+
+    @staticmethod
+    def accounts(
+        rows: int
+    ) -> tuple[list[Account], list[dict], dict[int, list[int]]]:
+        limit = settings.account_transactions_limit
+        accounts = []
+        transaction_ids = {}
+        for pk in range(1, rows + 1):
+            account = Account(id=pk, user_id=pk % 50, balance=pk * 10)
+            sent = [
+                Transaction(id=pk * limit + offset, timestamp=timezone.now())
+                for offset in range(limit)
+            ]
+            account.recent_transactions = sent
+            accounts.append(account)
+            transaction_ids[pk] = [transaction.pk for transaction in sent]
+
+        account_rows = [
+            {
+                'id': account.pk,
+                'user_id': account.user_id,
+                'balance': account.balance,
+                'shard_credits': 0
+            }
+            for account in accounts
+        ]
+        return accounts, account_rows, transaction_ids
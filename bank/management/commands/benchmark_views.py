@@ -0,0 +1,186 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from rest_framework.test import APIRequestFactory
+
+from bank import views
+from bank.benchmarks import LatencyReport
+from bank.async_views import AsyncAccountViewSet, AsyncTransactionViewSet
+from bank.models import Account
+from services import async_rabbit_mq, rabbit_mq
+from services.in_memory_transport import AsyncInMemoryTransport, \
+    FakeCoreService, InMemoryTransport
+
+VIEWS = {
+    'accounts': (views.AccountViewSet, AsyncAccountViewSet, 'account'),
+    'transactions': (
+        views.TransactionViewSet, AsyncTransactionViewSet, 'transaction'
+    )
+}
+SERVERS = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync views behind WSGI worker threads with the async '
+        'views on one event loop while the core service is slow.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--view',
+            choices=list(VIEWS),
+            default='accounts',
+            help='List endpoint every request calls.'
+        )
+        parser.add_argument(
+            '--server',
+            action='append',
+            choices=SERVERS,
+            help='Deployment to measure, may be repeated. Defaults to both.'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Number of requests per deployment.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=200,
+            help='Clients with a request in flight at any time.'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Worker threads of the WSGI deployment.'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=50,
+            help='Simulated core-service latency in milliseconds.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.options = options
+        user_id = Account.objects.values_list('user_id', flat=True).first()
+        if user_id is None:
+            raise CommandError('No account to list, create one first.')
+
+        self.service = FakeCoreService(
+            user={'user_id': user_id}, latency=options['latency'] / 1000
+        )
+        self.factory = APIRequestFactory()
+        transports = rabbit_mq.transport, async_rabbit_mq.transport
+        try:
+            self.stdout.write(
+                f'{"server":<8}{"workers":>8}{"ok":>7}{"errors":>8}'
+                f'{"rps":>10}{"mean":>9}{"p50":>9}{"p90":>9}{"p99":>9}'
+                f'{"max":>9}'
+            )
+            for server in options['server'] or SERVERS:
+                self.report(server, *self.run(server))
+        finally:
+            rabbit_mq.transport, async_rabbit_mq.transport = transports
+
+    def request(self):
+        # A fresh token per request, so every request waits on the core
+        # service instead of the auth context cache.
+        return self.factory.get(
+            '/',
+            HTTP_HOST='localhost',
+            HTTP_AUTHORIZATION=f'Bearer {uuid.uuid4().hex}'
+        )
+
+    def run(self, server: str) -> tuple[int, list[float], int, float]:
+        sync_view, async_view, basename = VIEWS[self.options['view']]
+        started = time.perf_counter()
+        if server == 'wsgi':
+            workers = self.options['threads']
+            rabbit_mq.transport = InMemoryTransport(
+                self.service, pool_size=workers
+            )
+            samples, errors = self.run_wsgi(
+                sync_view.as_view({'get': 'list'}, basename=basename),
+                workers
+            )
+        else:
+            workers = 1
+            async_rabbit_mq.transport = AsyncInMemoryTransport(self.service)
+            samples, errors = asyncio.run(self.run_asgi(
+                async_view.as_view({'get': 'list'}, basename=basename)
+            ))
+        return workers, samples, errors, time.perf_counter() - started
+
+    def run_wsgi(
+        self, view: Callable, threads: int
+    ) -> tuple[list[float], int]:
+        def handle() -> int:
+            try:
+                response = view(self.request())
+                response.render()
+                return response.status_code
+            finally:
+                close_old_connections()
+
+        # Clients wait in line for a free worker thread, as they do in
+        # front of a threaded WSGI server.
+        with ThreadPoolExecutor(threads) as workers:
+            def timed(_) -> float | None:
+                started = time.perf_counter()
+                if workers.submit(handle).result() != 200:
+                    return None
+                return time.perf_counter() - started
+
+            with ThreadPoolExecutor(self.options['concurrency']) as clients:
+                results = list(
+                    clients.map(timed, range(self.options['requests']))
+                )
+
+        samples = [sample for sample in results if sample is not None]
+        return samples, len(results) - len(samples)
+
+    async def run_asgi(
+        self, view: Callable[..., Awaitable]
+    ) -> tuple[list[float], int]:
+        slots = asyncio.Semaphore(self.options['concurrency'])
+
+        async def timed() -> float | None:
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    response = await view(self.request())
+                    response.render()
+                finally:
+                    await sync_to_async(close_old_connections)()
+                if response.status_code != 200:
+                    return None
+                return time.perf_counter() - started
+
+        results = await asyncio.gather(
+            *(timed() for _ in range(self.options['requests']))
+        )
+        samples = [sample for sample in results if sample is not None]
+        return samples, len(results) - len(samples)
+
+    def report(
+        self,
+        server: str,
+        workers: int,
+        samples: list[float],
+        errors: int,
+        elapsed: float
+    ) -> None:
+        self.stdout.write(
+            f'{server:<8}{workers:>8}'
+            f'{LatencyReport.columns(samples, errors, elapsed, precision=1)}'
+        )
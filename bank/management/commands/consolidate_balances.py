@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bank.balances import BalanceShards
+from bank.models import AccountBalanceShard
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded balances of hot accounts back into their rows.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--account',
+            type=int,
+            help='Account to configure with --shards instead of '
+                 'consolidating.'
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            help='Number of balance shards for --account, 0 turns '
+                 'sharding off.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between consolidation runs.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit after a single consolidation run.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options['account'] is not None or options['shards'] is not None:
+            self.configure(options['account'], options['shards'])
+            return
+
+        try:
+            while True:
+                consolidated = self.consolidate()
+                self.stdout.write(f'Consolidated {consolidated} accounts')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def configure(self, account_id: int | None, count: int | None) -> None:
+        if account_id is None or count is None:
+            raise CommandError('--account and --shards go together')
+        if count < 0:
+            raise CommandError('--shards must not be negative')
+        if not BalanceShards.configure(account_id, count):
+            raise CommandError(f'Account {account_id} not found')
+
+        self.stdout.write(f'Account {account_id} uses {count} balance shards')
+
+    @staticmethod
+    def consolidate() -> int:
+        account_ids = AccountBalanceShard.objects.exclude(
+            balance=0
+        ).order_by('account_id').values_list(
+            'account_id', flat=True
+        ).distinct()
+        consolidated = 0
+        for account_id in list(account_ids):
+            if BalanceShards.consolidate(account_id):
+                consolidated += 1
+        return consolidated
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bank.ledger import Ledger
+from bank.models import Account
+
+
+class Command(BaseCommand):
+    help = 'Take balance snapshots for accounts with new ledger entries.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--min-entries',
+            type=int,
+            default=1000,
+            help='Minimum number of new ledger entries to take a snapshot.'
+        )
+        parser.add_argument(
+            '--lag',
+            type=int,
+            default=60,
+            help='Ignore ledger entries younger than this many seconds.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        cutoff = timezone.now() - timedelta(seconds=options['lag'])
+        created = 0
+        account_ids = Account.objects.values_list('pk', flat=True)
+        for account_id in account_ids.iterator():
+            snapshot = Ledger.snapshot(
+                account_id, cutoff, options['min_entries']
+            )
+            if snapshot is not None:
+                created += 1
+
+        self.stdout.write(f'Created {created} balance snapshots')
@@ -0,0 +1,81 @@
+import pika
+from django.core.management.base import BaseCommand
+from pika.adapters.blocking_connection import BlockingChannel
+
+from bank.models import OutboxEvent
+from bank.outbox import Outbox
+from services import rabbit_mq
+from services.rpc_codec import json_codec
+from settings import settings
+
+
+class Command(BaseCommand):
+    help = 'Publish outbox events to the events exchange.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.outbox_batch_size,
+            help='Maximum number of events published per commit.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.outbox_poll_interval,
+            help='Seconds to wait when the outbox is empty.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the outbox is drained.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        connection = pika.BlockingConnection(rabbit_mq.parameters)
+        channel = connection.channel()
+        channel.exchange_declare(
+            settings.events_exchange, exchange_type='topic', durable=True
+        )
+        # A batch is published in one channel transaction, tx_commit
+        # returns once the broker took every message of it, one round trip
+        # per batch instead of a confirm per message.
+        channel.tx_select()
+
+        relayed = 0
+        try:
+            while True:
+                published = Outbox.relay(
+                    options['batch_size'],
+                    lambda events: self.publish(channel, events)
+                )
+                relayed += published
+                if published:
+                    continue
+                if options['once']:
+                    break
+                connection.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(f'Relayed {relayed} events')
+
+    @staticmethod
+    def publish(channel: BlockingChannel, events: list[OutboxEvent]) -> None:
+        for event in events:
+            channel.basic_publish(
+                exchange=settings.events_exchange,
+                routing_key=event.topic,
+                body=json_codec.dumps(event.payload),
+                properties=pika.BasicProperties(
+                    content_type=json_codec.content_type,
+                    # Delivery is at least once, consumers deduplicate
+                    # on the message id.
+                    message_id=f'outbox-{event.pk}',
+                    timestamp=int(event.created.timestamp()),
+                    delivery_mode=pika.DeliveryMode.Persistent
+                )
+            )
+        channel.tx_commit()
@@ -0,0 +1,121 @@
+import time
+from datetime import timedelta
+
+import pika
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bank.models import TransferRequest
+from bank.transfers import TransferEngine
+from services import rabbit_mq
+from services.rpc_codec import codec_for
+from settings import settings
+
+
+class Command(BaseCommand):
+    help = 'Settle queued transfer requests in micro-batches.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.settle_batch_size,
+            help='Maximum number of transfer requests settled per commit.'
+        )
+        parser.add_argument(
+            '--batch-wait',
+            type=float,
+            default=settings.settle_batch_wait,
+            help='Seconds to wait for a batch to fill before settling it.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is drained.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        batch_size = options['batch_size']
+        batch_wait = options['batch_wait']
+        self.settled = 0
+        self.recover(batch_size)
+        recovered_at = time.monotonic()
+
+        connection = pika.BlockingConnection(rabbit_mq.parameters)
+        channel = connection.channel()
+        channel.queue_declare(settings.transfer_queue, durable=True)
+        channel.basic_qos(prefetch_count=batch_size)
+
+        batch: list[int] = []
+        last_tag = None
+        started = time.monotonic()
+        try:
+            for method, properties, body in channel.consume(
+                settings.transfer_queue, inactivity_timeout=batch_wait
+            ):
+                if method is not None:
+                    if last_tag is None:
+                        started = time.monotonic()
+                    last_tag = method.delivery_tag
+                    transfer_request_id = self.decode(properties, body)
+                    if transfer_request_id is not None:
+                        batch.append(transfer_request_id)
+                    if (
+                        len(batch) < batch_size
+                        and time.monotonic() - started < batch_wait
+                    ):
+                        continue
+
+                if last_tag is not None:
+                    self.settle(batch)
+                    # Acked only after the batch committed, a crash before
+                    # that redelivers it and settled requests are skipped.
+                    channel.basic_ack(last_tag, multiple=True)
+                    batch, last_tag = [], None
+                elif options['once']:
+                    break
+                elif (
+                    time.monotonic() - recovered_at
+                    >= settings.settle_recover_after
+                ):
+                    self.recover(batch_size)
+                    recovered_at = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            channel.cancel()
+            connection.close()
+
+        self.stdout.write(f'Settled {self.settled} transfer requests')
+
+    @staticmethod
+    def decode(
+        properties: pika.BasicProperties, body: bytes
+    ) -> int | None:
+        try:
+            payload = codec_for(properties.content_type).loads(body)
+            return int(payload['id'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def settle(self, transfer_request_ids: list[int]) -> None:
+        if transfer_request_ids:
+            self.settled += TransferEngine.settle_requests(
+                transfer_request_ids
+            )
+
+    def recover(self, batch_size: int) -> None:
+        # Requests whose message never reached the queue.
+        cutoff = timezone.now() - timedelta(
+            seconds=settings.settle_recover_after
+        )
+        pending = TransferRequest.objects.filter(
+            status=TransferRequest.Status.PENDING, created__lt=cutoff
+        ).order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for transfer_request_id in pending.iterator():
+            batch.append(transfer_request_id)
+            if len(batch) == batch_size:
+                self.settle(batch)
+                batch = []
+        self.settle(batch)
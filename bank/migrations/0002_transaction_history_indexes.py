@@ -0,0 +1,25 @@
+# Generated by Django 4.1.13 on 2026-10-17 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={'ordering': ['timestamp', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['sender_id', 'timestamp'], name='transaction_sender_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['recipient_id', 'timestamp'], name='transaction_recipient_time_idx'),
+        ),
+    ]
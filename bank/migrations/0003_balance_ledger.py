@@ -0,0 +1,60 @@
+# Generated by Django 4.1.13 on 2026-10-17 12:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_ledger(apps, schema_editor):
+    Account = apps.get_model('bank', 'Account')
+    LedgerEntry = apps.get_model('bank', 'LedgerEntry')
+    LedgerEntry.objects.bulk_create(
+        LedgerEntry(account_id_id=account_id, amount=balance)
+        for account_id, balance in Account.objects.exclude(
+            balance=0
+        ).values_list('pk', 'balance').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0002_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('account_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='bank.account')),
+                ('transaction_id', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='bank.transaction')),
+            ],
+            options={
+                'ordering': ['timestamp', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.IntegerField()),
+                ('timestamp', models.DateTimeField()),
+                ('account_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='bank.account')),
+                ('ledger_entry_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bank.ledgerentry')),
+            ],
+            options={
+                'ordering': ['timestamp', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account_id', 'timestamp'], name='ledger_account_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['account_id', 'timestamp'], name='snapshot_account_time_idx'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-17 12:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0004_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('settled', 'Settled'), ('rejected', 'Rejected')], default='pending', max_length=16)),
+                ('detail', models.CharField(blank=True, default='', max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('settled', models.DateTimeField(null=True)),
+                ('recipient_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='received_transfer_requests', to='bank.account')),
+                ('sender_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sent_transfer_requests', to='bank.account')),
+                ('transaction_id', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bank.transaction')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transferrequest',
+            index=models.Index(fields=['status', 'created'], name='transfer_request_status_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-17 12:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0005_transfer_request'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='AccountBalanceShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('balance', models.IntegerField(default=0)),
+                ('account_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_shards', to='bank.account')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='accountbalanceshard',
+            constraint=models.UniqueConstraint(fields=('account_id', 'shard'), name='balance_shard_account_uniq'),
+        ),
+    ]
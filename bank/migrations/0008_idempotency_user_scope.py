@@ -0,0 +1,29 @@
+# Generated by Django 4.1.13 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0007_outbox_event'),
+    ]
+
+    operations = [
+        # Existing keys belong to no user and expire with the TTL.
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='user_id',
+            field=models.IntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='key',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user_id', 'key'), name='idempotency_user_key_uniq'),
+        ),
+    ]
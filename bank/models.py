@@ -1,4 +1,113 @@
+import heapq
+
 from django.db import models
+from django.db.models import F, OuterRef, Prefetch, Subquery, Sum, \
+    prefetch_related_objects
+from django.db.models.expressions import RawSQL, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+
+class TransactionQuerySet(models.QuerySet):
+
+    def for_user(self, user_id: int) -> "TransactionQuerySet":
+        account_ids = list(
+            Account.objects.filter(user_id=user_id)
+            .values_list('pk', flat=True)
+        )
+        return self.for_accounts(account_ids)
+
+    def for_accounts(self, account_ids: list[int]) -> "TransactionQuerySet":
+        if not account_ids:
+            return self.none()
+
+        # Each leg of the UNION is served by its own (account, timestamp)
+        # index, unlike an OR across both foreign keys.
+        sent = self.model.objects.filter(
+            sender_id__in=account_ids
+        ).order_by().values('pk')
+        received = self.model.objects.filter(
+            recipient_id__in=account_ids
+        ).order_by().values('pk')
+        return self.filter(pk__in=sent.union(received))
+
+    def history(self, account_ids: list[int]) -> "TransactionHistory":
+        if not account_ids:
+            return TransactionHistory([self.none()])
+
+        return TransactionHistory([
+            self.filter(sender_id__in=account_ids),
+            self.filter(recipient_id__in=account_ids)
+        ])
+
+    def latest_per_account(
+        self, field: str, account_ids: list[int], limit: int
+    ) -> "TransactionQuerySet":
+        ranked = self.model.objects.filter(
+            **{f'{field}__in': account_ids}
+        ).order_by().annotate(
+            recent_rank=Window(
+                RowNumber(),
+                partition_by=F(field),
+                order_by=[F('timestamp').desc(), F('id').desc()]
+            )
+        ).values('pk', 'recent_rank')
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(pk__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) ranked '
+            f'WHERE ranked.recent_rank <= %s',
+            (*params, limit)
+        ))
+
+
+class TransactionHistory:
+    # Pages the sent and received legs separately, so each one walks its
+    # own (account, timestamp) index with the cursor bound and LIMIT, and
+    # merges the two pages here. A sliced UNION would do the same in SQL,
+    # but SQLite does not allow LIMIT inside compound queries. Supports
+    # what CursorPagination calls: order_by, filter, values and a slice.
+
+    def __init__(
+        self,
+        legs: list[TransactionQuerySet],
+        ordering: tuple[str, ...] = ('timestamp', 'id')
+    ) -> None:
+        self.legs = legs
+        self.ordering = ordering
+
+    def order_by(self, *ordering: str) -> "TransactionHistory":
+        return TransactionHistory(
+            [leg.order_by(*ordering) for leg in self.legs], ordering
+        )
+
+    def filter(self, *args, **kwargs) -> "TransactionHistory":
+        return TransactionHistory(
+            [leg.filter(*args, **kwargs) for leg in self.legs], self.ordering
+        )
+
+    def values(self, *fields: str) -> "TransactionHistory":
+        return TransactionHistory(
+            [leg.values(*fields) for leg in self.legs], self.ordering
+        )
+
+    def __getitem__(self, key: slice) -> list:
+        fields = [field.lstrip('-') for field in self.ordering]
+
+        def position(row) -> tuple:
+            if isinstance(row, dict):
+                return tuple(row[field] for field in fields)
+            return tuple(getattr(row, field) for field in fields)
+
+        rows = []
+        for row in heapq.merge(
+            *(leg[:key.stop] for leg in self.legs),
+            key=position,
+            reverse=self.ordering[0].startswith('-')
+        ):
+            # Transfers between two of the accounts are in both legs.
+            if rows and position(rows[-1]) == position(row):
+                continue
+            rows.append(row)
+        return rows[key]
 
 
 class Transaction(models.Model):
@@ -15,8 +124,20 @@ class Transaction(models.Model):
     amount = models.IntegerField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
-        ordering = ['timestamp']
+        ordering = ['timestamp', 'id']
+        indexes = [
+            models.Index(
+                fields=['sender_id', 'timestamp'],
+                name='transaction_sender_time_idx'
+            ),
+            models.Index(
+                fields=['recipient_id', 'timestamp'],
+                name='transaction_recipient_time_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
@@ -25,9 +146,239 @@ class Transaction(models.Model):
         )
 
 
+class AccountQuerySet(models.QuerySet):
+
+    def with_balance(self) -> "AccountQuerySet":
+        credits = AccountBalanceShard.objects.filter(
+            account_id=OuterRef('pk')
+        ).order_by().values('account_id').annotate(
+            total=Sum('balance')
+        ).values('total')
+        return self.annotate(shard_credits=Coalesce(Subquery(credits), 0))
+
+
 class Account(models.Model):
-    user_id = models.IntegerField()
+    user_id = models.IntegerField(unique=True)
     balance = models.IntegerField(default=0)
+    # Hot accounts take credits on this many AccountBalanceShard rows
+    # instead of their own row, see bank.balances.
+    shard_count = models.PositiveSmallIntegerField(default=0)
+
+    objects = AccountQuerySet.as_manager()
 
     def __str__(self) -> str:
         return f'Account {self.id}'
+
+    @property
+    def total_balance(self) -> int:
+        credits = getattr(self, 'shard_credits', None)
+        if credits is None:
+            credits = 0
+            if self.shard_count:
+                credits = self.balance_shards.aggregate(
+                    total=Sum('balance')
+                )['total'] or 0
+        return self.balance + credits
+
+    @classmethod
+    def recent_transaction_ids(
+        cls, account_ids: list[int], limit: int
+    ) -> dict[int, list[int]]:
+        accounts = [cls(pk=account_id) for account_id in account_ids]
+        cls.prefetch_transactions(accounts, limit)
+        return {
+            account.pk: [
+                transaction.pk for transaction in account.recent_transactions
+            ]
+            for account in accounts
+        }
+
+    @classmethod
+    def prefetch_transactions(
+        cls, accounts: list["Account"], limit: int
+    ) -> None:
+        account_ids = [account.pk for account in accounts]
+        fields = ['id', 'sender_id', 'recipient_id', 'timestamp']
+        prefetch_related_objects(
+            accounts,
+            Prefetch(
+                'sender_transactions',
+                queryset=Transaction.objects.latest_per_account(
+                    'sender_id', account_ids, limit
+                ).only(*fields),
+                to_attr='recent_sender_transactions'
+            ),
+            Prefetch(
+                'recipient_transactions',
+                queryset=Transaction.objects.latest_per_account(
+                    'recipient_id', account_ids, limit
+                ).only(*fields),
+                to_attr='recent_recipient_transactions'
+            )
+        )
+        for account in accounts:
+            account.recent_transactions = sorted(
+                account.recent_sender_transactions
+                + account.recent_recipient_transactions,
+                key=lambda transaction: (
+                    transaction.timestamp, transaction.pk
+                ),
+                reverse=True
+            )[:limit]
+
+
+class AccountBalanceShard(models.Model):
+    account_id = models.ForeignKey(
+        'Account',
+        related_name='balance_shards',
+        on_delete=models.CASCADE
+    )
+    shard = models.PositiveSmallIntegerField()
+    balance = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account_id', 'shard'],
+                name='balance_shard_account_uniq'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Balance shard {self.shard} of Account {self.account_id}'
+
+
+class LedgerEntry(models.Model):
+    account_id = models.ForeignKey(
+        'Account',
+        related_name='ledger_entries',
+        on_delete=models.CASCADE
+    )
+    transaction_id = models.ForeignKey(
+        'Transaction',
+        related_name='ledger_entries',
+        null=True,
+        on_delete=models.SET_NULL
+    )
+    amount = models.IntegerField()
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['timestamp', 'id']
+        indexes = [
+            models.Index(
+                fields=['account_id', 'timestamp'],
+                name='ledger_account_time_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Ledger entry {self.amount} on Account {self.account_id}'
+
+
+class BalanceSnapshot(models.Model):
+    account_id = models.ForeignKey(
+        'Account',
+        related_name='balance_snapshots',
+        on_delete=models.CASCADE
+    )
+    ledger_entry_id = models.ForeignKey(
+        'LedgerEntry',
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    balance = models.IntegerField()
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['timestamp', 'id']
+        indexes = [
+            models.Index(
+                fields=['account_id', 'timestamp'],
+                name='snapshot_account_time_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Balance {self.balance} of Account {self.account_id}'
+
+
+class TransferRequest(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        SETTLED = 'settled'
+        REJECTED = 'rejected'
+
+    sender_id = models.ForeignKey(
+        'Account',
+        related_name='sent_transfer_requests',
+        on_delete=models.CASCADE
+    )
+    recipient_id = models.ForeignKey(
+        'Account',
+        related_name='received_transfer_requests',
+        on_delete=models.CASCADE
+    )
+    amount = models.IntegerField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    detail = models.CharField(max_length=255, blank=True, default='')
+    transaction_id = models.ForeignKey(
+        'Transaction',
+        related_name='+',
+        null=True,
+        on_delete=models.SET_NULL
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    settled = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'created'],
+                name='transfer_request_status_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f'Transfer request {self.amount} From Account {self.sender_id} '
+            f'To Account {self.recipient_id}: {self.status}'
+        )
+
+
+class IdempotencyKey(models.Model):
+    user_id = models.IntegerField()
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'key'],
+                name='idempotency_user_key_uniq'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Idempotency key {self.key}'
+
+    @property
+    def is_complete(self) -> bool:
+        return self.status_code is not None
+
+
+class OutboxEvent(models.Model):
+    topic = models.CharField(max_length=64)
+    payload = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self) -> str:
+        return f'Outbox event {self.id} {self.topic}'
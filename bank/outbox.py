@@ -0,0 +1,47 @@
+from typing import Callable
+
+from django.db.transaction import atomic
+from rest_framework import serializers
+
+from bank.models import OutboxEvent, Transaction
+
+
+class Outbox:
+    transaction_created = 'transaction.created'
+
+    @classmethod
+    def record(cls, transactions: list[Transaction]) -> None:
+        timestamp = serializers.DateTimeField().to_representation
+        OutboxEvent.objects.bulk_create([
+            OutboxEvent(
+                topic=cls.transaction_created,
+                payload={
+                    'id': transaction.pk,
+                    'sender_id': transaction.sender_id_id,
+                    'recipient_id': transaction.recipient_id_id,
+                    'amount': transaction.amount,
+                    'timestamp': timestamp(transaction.timestamp)
+                }
+            )
+            for transaction in transactions
+        ])
+
+    @staticmethod
+    @atomic()
+    def relay(
+        batch_size: int, publish: Callable[[list[OutboxEvent]], None]
+    ) -> int:
+        # Rows stay locked until the broker confirmed them, other relays
+        # skip them, and a crash before the delete publishes them again.
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .order_by('pk')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        publish(events)
+        OutboxEvent.objects.filter(
+            pk__in=[event.pk for event in events]
+        ).delete()
+        return len(events)
@@ -0,0 +1,89 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings as django_settings
+from django.core.cache import BaseCache, caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.viewsets import ViewSetMixin
+
+from settings import settings
+
+# The view whose reads may go to a replica, set for the whole dispatch.
+replica_view: ContextVar[ViewSetMixin | None] = ContextVar(
+    'replica_view', default=None
+)
+
+
+class Replicas:
+    __key_prefix = 'replica_sticky:'
+
+    @staticmethod
+    def aliases() -> list[str]:
+        return [
+            alias for alias in django_settings.DATABASES
+            if alias.startswith('replica_')
+        ]
+
+    @staticmethod
+    def cache() -> BaseCache:
+        return caches[settings.sql_replica_cache_alias]
+
+    @staticmethod
+    @contextmanager
+    def reads(view: ViewSetMixin | None) -> Iterator[None]:
+        token = replica_view.set(view)
+        try:
+            yield
+        finally:
+            replica_view.reset(token)
+
+    @classmethod
+    def pin(cls, user_id: int) -> None:
+        if not cls.aliases():
+            return
+
+        # Reads of a user who just wrote go to the primary until the
+        # replicas had time to catch up.
+        cls.cache().set(
+            f'{cls.__key_prefix}{user_id}',
+            True,
+            timeout=settings.sql_replica_sticky_seconds
+        )
+
+    @classmethod
+    def alias_for(cls, view: ViewSetMixin) -> str | None:
+        alias = getattr(view, 'replica_alias', False)
+        if alias is not False:
+            return alias
+
+        auth_context = getattr(view.request, 'auth_context', None)
+        if auth_context is None:
+            return None
+
+        aliases = cls.aliases()
+        if not aliases or cls.cache().get(
+            f'{cls.__key_prefix}{auth_context.user_id}'
+        ):
+            alias = None
+        else:
+            alias = random.choice(aliases)
+        view.replica_alias = alias
+        return alias
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints) -> str | None:
+        view = replica_view.get()
+        if view is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return Replicas.alias_for(view)
+
+    def db_for_write(self, model, **hints) -> str:
+        # Objects read from a replica are still saved to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        return True
@@ -1,14 +1,14 @@
+from typing import Any, Callable, Iterable
+
 from django.db.transaction import atomic
 from rest_framework import serializers
-from rest_framework.exceptions import APIException
-
-from bank.models import Transaction, Account
-
+from rest_framework.reverse import reverse
 
-class TransactionError(APIException):
-    status_code = 422
-    default_detail = 'Something wont wrong. Please try again later.'
-    default_code = 'something_wont_wrong'
+from bank.balances import BalanceShards
+from bank.ledger import Ledger
+from bank.models import Transaction, Account, TransferRequest
+from bank.transfers import TransactionError, TransferEngine
+from settings import settings
 
 
 class TransactionSerializer(serializers.HyperlinkedModelSerializer):
@@ -31,7 +31,6 @@ class TransactionSerializer(serializers.HyperlinkedModelSerializer):
             'owner'
         ]
 
-    @atomic()
     def create(self, validated_data: dict) -> Transaction:
         sender: Account = validated_data.get('sender_id')
         recipient: Account = validated_data.get('recipient_id')
@@ -42,35 +41,164 @@ class TransactionSerializer(serializers.HyperlinkedModelSerializer):
             raise TransactionError(
                 detail='The sender and the recipient must not be the same'
             )
-        if sender.balance < amount:
-            raise TransactionError(detail='Not enough funds')
 
-        sender.balance -= amount
-        sender.save()
-        recipient.balance += amount
-        recipient.save()
+        return TransferEngine.transfer(sender.pk, recipient.pk, amount)
+
+
+class TransferRequestSerializer(serializers.HyperlinkedModelSerializer):
+    sender_id = serializers.PrimaryKeyRelatedField(read_only=True)
+    recipient_id = serializers.PrimaryKeyRelatedField(read_only=True)
+    transaction_id = serializers.HyperlinkedRelatedField(
+        view_name='transaction-detail', read_only=True
+    )
+
+    class Meta:
+        model = TransferRequest
+        fields = [
+            'url',
+            'id',
+            'sender_id',
+            'recipient_id',
+            'amount',
+            'status',
+            'detail',
+            'transaction_id',
+            'created',
+            'settled'
+        ]
+        extra_kwargs = {'url': {'view_name': 'transfer-detail'}}
+
+
+class RecentTransactionsMixin:
+    transactions_limit = settings.account_transactions_limit
 
-        return Transaction.objects.create(
-            sender_id=sender, recipient_id=recipient, amount=amount
-        )
+    def to_representation(self, instance: Account) -> dict:
+        # Views that list or fetch accounts in bulk prefetch beforehand.
+        if not hasattr(instance, 'recent_transactions'):
+            Account.prefetch_transactions([instance], self.transactions_limit)
+        return super().to_representation(instance)
 
 
-class AccountSerializer(serializers.HyperlinkedModelSerializer):
+class AccountSerializer(
+    RecentTransactionsMixin, serializers.HyperlinkedModelSerializer
+):
     transactions = serializers.HyperlinkedRelatedField(
-        many=True, view_name='transaction-detail', read_only=True
+        many=True,
+        view_name='transaction-detail',
+        read_only=True,
+        source='recent_transactions'
     )
+    balance = serializers.IntegerField(source='total_balance', read_only=True)
 
     class Meta:
         model = Account
         fields = ['url', 'id', 'user_id', 'balance', 'transactions']
 
 
-class AccountPUTSerializer(serializers.HyperlinkedModelSerializer):
+class AccountPUTSerializer(
+    RecentTransactionsMixin, serializers.HyperlinkedModelSerializer
+):
     transactions = serializers.HyperlinkedRelatedField(
-        many=True, view_name='transaction-detail', read_only=True
+        many=True,
+        view_name='transaction-detail',
+        read_only=True,
+        source='recent_transactions'
     )
     user_id = serializers.CharField(read_only=True)
 
     class Meta:
         model = Account
         fields = ['url', 'id', 'user_id', 'balance', 'transactions']
+
+    @atomic()
+    def update(self, instance: Account, validated_data: dict) -> Account:
+        BalanceShards.consolidate(instance.pk)
+        previous_balance = Account.objects.select_for_update().values_list(
+            'balance', flat=True
+        ).get(pk=instance.pk)
+
+        instance = super().update(instance, validated_data)
+        if instance.balance != previous_balance:
+            Ledger.adjust(instance.pk, instance.balance - previous_balance)
+        # Shards locked by in-flight credits were skipped above, sum what
+        # is left on them again rather than trusting the loaded annotation.
+        instance.shard_credits = None
+        return instance
+
+    def to_representation(self, instance: Account) -> dict:
+        representation = super().to_representation(instance)
+        representation['balance'] = instance.total_balance
+        return representation
+
+
+URL_PLACEHOLDER = '__pk__'
+
+
+def url_template(view_name: str, context: dict) -> Callable[[Any], str]:
+    url = reverse(
+        view_name,
+        kwargs={'pk': URL_PLACEHOLDER},
+        request=context['request'],
+        format=context.get('format')
+    )
+    prefix, _, suffix = url.rpartition(URL_PLACEHOLDER)
+    return lambda pk: f'{prefix}{pk}{suffix}'
+
+
+# Render values() rows byte-for-byte like the hyperlinked serializers above,
+# without building a field tree and reversing URLs for every row.
+class TransactionValuesSerializer:
+    fields = ['id', 'sender_id', 'recipient_id', 'amount', 'timestamp']
+
+    def __init__(self, rows: Iterable[dict], context: dict) -> None:
+        self.rows = rows
+        self.url = url_template('transaction-detail', context)
+        self.timestamp = serializers.DateTimeField().to_representation
+
+    @property
+    def data(self) -> list[dict]:
+        url = self.url
+        timestamp = self.timestamp
+        return [
+            {
+                'url': url(row['id']),
+                'sender_id': row['sender_id'],
+                'recipient_id': row['recipient_id'],
+                'amount': row['amount'],
+                'timestamp': timestamp(row['timestamp'])
+            }
+            for row in self.rows
+        ]
+
+
+class AccountValuesSerializer:
+    fields = ['id', 'user_id', 'balance', 'shard_credits']
+
+    def __init__(
+        self,
+        rows: Iterable[dict],
+        transaction_ids: dict[int, list[int]],
+        context: dict
+    ) -> None:
+        self.rows = rows
+        self.transaction_ids = transaction_ids
+        self.url = url_template('account-detail', context)
+        self.transaction_url = url_template('transaction-detail', context)
+
+    @property
+    def data(self) -> list[dict]:
+        url = self.url
+        transaction_url = self.transaction_url
+        return [
+            {
+                'url': url(row['id']),
+                'id': row['id'],
+                'user_id': row['user_id'],
+                'balance': row['balance'] + row['shard_credits'],
+                'transactions': [
+                    transaction_url(pk)
+                    for pk in self.transaction_ids.get(row['id'], [])
+                ]
+            }
+            for row in self.rows
+        ]
@@ -0,0 +1,310 @@
+from collections import defaultdict
+from typing import Any, Callable
+
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.transaction import atomic, on_commit
+from django.utils import timezone
+from loguru import logger
+from rest_framework.exceptions import APIException
+
+from bank.balances import BalanceShards
+from bank.ledger import Ledger
+from bank.models import Account, Transaction, TransferRequest
+from bank.outbox import Outbox
+from settings import settings
+
+
+class TransactionError(APIException):
+    status_code = 422
+    default_detail = 'Something wont wrong. Please try again later.'
+    default_code = 'something_wont_wrong'
+
+
+class TransferEngine:
+
+    @classmethod
+    @atomic()
+    def transfer(
+        cls, sender_id: int, recipient_id: int, amount: int
+    ) -> Transaction:
+        if sender_id == recipient_id:
+            raise TransactionError(
+                detail='The sender and the recipient must not be the same'
+            )
+        if amount <= 0:
+            raise TransactionError(detail='Amount should be more then 0')
+
+        locked = cls.lock_accounts(
+            [sender_id, recipient_id], credited=[recipient_id]
+        )
+        if sender_id not in locked:
+            raise TransactionError(detail='Account not found')
+
+        if not cls.debit(sender_id, amount):
+            raise TransactionError(detail='Not enough funds')
+        if recipient_id in locked:
+            Account.objects.filter(pk=recipient_id).update(
+                balance=F('balance') + amount
+            )
+        elif not BalanceShards.credit(recipient_id, amount):
+            raise TransactionError(detail='Account not found')
+
+        transaction = Transaction.objects.create(
+            sender_id_id=sender_id, recipient_id_id=recipient_id, amount=amount
+        )
+        Ledger.record([transaction])
+        Outbox.record([transaction])
+        return transaction
+
+    @classmethod
+    def bulk_transfer(
+        cls, user_id: int, items: list, chunk_size: int
+    ) -> list[dict]:
+        results: list[dict | None] = [None] * len(items)
+        transfers: list[tuple[int, int, int, int]] = []
+
+        for index, item in enumerate(items):
+            try:
+                sender_id = cls.to_int(item['sender_id'])
+                recipient_id = cls.to_int(item['recipient_id'])
+                amount = cls.to_int(item['amount'])
+            except (KeyError, TypeError, ValueError):
+                results[index] = cls.rejected(index, 'Invalid transfer')
+                continue
+
+            if amount <= 0:
+                results[index] = cls.rejected(
+                    index, 'Amount should be more then 0'
+                )
+            elif sender_id == recipient_id:
+                results[index] = cls.rejected(
+                    index, 'The sender and the recipient must not be the same'
+                )
+            else:
+                transfers.append((index, sender_id, recipient_id, amount))
+
+        account_ids = {
+            account_id
+            for _, sender_id, recipient_id, _ in transfers
+            for account_id in (sender_id, recipient_id)
+        }
+        owners = dict(
+            Account.objects.filter(pk__in=account_ids)
+            .values_list('pk', 'user_id')
+        )
+
+        accepted = []
+        for transfer in transfers:
+            index, sender_id, recipient_id, _ = transfer
+            if sender_id not in owners:
+                results[index] = cls.rejected(
+                    index, 'Sender account not found!'
+                )
+            elif recipient_id not in owners:
+                results[index] = cls.rejected(
+                    index, 'Recipient account not found!'
+                )
+            elif owners[sender_id] != user_id:
+                results[index] = cls.rejected(
+                    index, 'You do not have permission for this!'
+                )
+            else:
+                accepted.append(transfer)
+
+        for start in range(0, len(accepted), chunk_size):
+            cls.settle_chunk(accepted[start:start + chunk_size], results)
+
+        return results
+
+    @classmethod
+    def enqueue(
+        cls,
+        sender_id: int,
+        recipient_id: int,
+        amount: int,
+        publish: Callable[[str, Any], None]
+    ) -> TransferRequest:
+        if sender_id == recipient_id:
+            raise TransactionError(
+                detail='The sender and the recipient must not be the same'
+            )
+
+        transfer_request = TransferRequest.objects.create(
+            sender_id_id=sender_id, recipient_id_id=recipient_id, amount=amount
+        )
+        on_commit(lambda: cls.publish(publish, transfer_request.pk))
+        return transfer_request
+
+    @staticmethod
+    def publish(
+        publish: Callable[[str, Any], None], transfer_request_id: int
+    ) -> None:
+        try:
+            publish(settings.transfer_queue, {'id': transfer_request_id})
+        except APIException as exc:
+            # The request is durable already, settle_transfers picks up
+            # pending requests that never reached the queue.
+            logger.warning(
+                f'Transfer request {transfer_request_id} was not queued, '
+                f'left for recovery: {exc.detail}'
+            )
+
+    @classmethod
+    @atomic()
+    def settle_requests(cls, transfer_request_ids: list[int]) -> int:
+        pending = list(
+            TransferRequest.objects.select_for_update(skip_locked=True)
+            .filter(
+                pk__in=transfer_request_ids,
+                status=TransferRequest.Status.PENDING
+            )
+            .order_by('pk')
+        )
+        transfers: list[tuple[int, int, int, int]] = []
+        for index, transfer_request in enumerate(pending):
+            transfers.append((
+                index,
+                transfer_request.sender_id_id,
+                transfer_request.recipient_id_id,
+                transfer_request.amount
+            ))
+        results: list[dict | None] = [None] * len(pending)
+        cls.settle_chunk(transfers, results)
+
+        settled = timezone.now()
+        for transfer_request, result in zip(pending, results):
+            if result['status'] == 'created':
+                transfer_request.status = TransferRequest.Status.SETTLED
+                transfer_request.transaction_id_id = result['id']
+            else:
+                transfer_request.status = TransferRequest.Status.REJECTED
+                transfer_request.detail = result['detail']
+            transfer_request.settled = settled
+        TransferRequest.objects.bulk_update(
+            pending, ['status', 'detail', 'transaction_id', 'settled']
+        )
+        return len(pending)
+
+    @classmethod
+    @atomic()
+    def settle_chunk(
+        cls,
+        transfers: list[tuple[int, int, int, int]],
+        results: list[dict | None]
+    ) -> None:
+        sender_ids = {sender_id for _, sender_id, _, _ in transfers}
+        recipient_ids = {recipient_id for _, _, recipient_id, _ in transfers}
+        balances = dict(
+            Account.objects.select_for_update()
+            .filter(pk__in=sender_ids | recipient_ids)
+            .exclude(pk__in=recipient_ids - sender_ids, shard_count__gt=0)
+            .order_by('pk')
+            .values_list('pk', 'balance')
+        )
+        missing = recipient_ids - balances.keys()
+        sharded = set(
+            Account.objects.filter(pk__in=missing)
+            .values_list('pk', flat=True)
+        ) if missing else set()
+
+        deltas: dict[int, int] = defaultdict(int)
+        credits: dict[int, int] = defaultdict(int)
+        consolidated: set[int] = set()
+        created: list[tuple[int, Transaction]] = []
+        for index, sender_id, recipient_id, amount in transfers:
+            if sender_id not in balances or (
+                recipient_id not in balances and recipient_id not in sharded
+            ):
+                results[index] = cls.rejected(index, 'Account not found')
+                continue
+            if (
+                balances[sender_id] < amount
+                and sender_id not in consolidated
+            ):
+                consolidated.add(sender_id)
+                balances[sender_id] += BalanceShards.consolidate(sender_id)
+            if balances[sender_id] < amount:
+                results[index] = cls.rejected(index, 'Not enough funds')
+                continue
+
+            balances[sender_id] -= amount
+            deltas[sender_id] -= amount
+            if recipient_id in balances:
+                balances[recipient_id] += amount
+                deltas[recipient_id] += amount
+            else:
+                credits[recipient_id] += amount
+            created.append((
+                index,
+                Transaction(
+                    sender_id_id=sender_id,
+                    recipient_id_id=recipient_id,
+                    amount=amount
+                )
+            ))
+
+        cls.apply_deltas(deltas)
+        for account_id in sorted(credits):
+            BalanceShards.credit(account_id, credits[account_id])
+        transactions = Transaction.objects.bulk_create(
+            [transaction for _, transaction in created]
+        )
+        Ledger.record(transactions)
+        Outbox.record(transactions)
+        for index, transaction in created:
+            results[index] = {
+                'index': index, 'status': 'created', 'id': transaction.pk
+            }
+
+    @staticmethod
+    def apply_deltas(deltas: dict[int, int]) -> None:
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        Account.objects.filter(pk__in=deltas).update(
+            balance=F('balance') + Case(
+                *[
+                    When(pk=pk, then=Value(delta))
+                    for pk, delta in deltas.items()
+                ],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        )
+
+    @staticmethod
+    def debit(account_id: int, amount: int) -> bool:
+        debited = Account.objects.filter(
+            pk=account_id, balance__gte=amount
+        ).update(balance=F('balance') - amount)
+        if not debited and BalanceShards.consolidate(account_id):
+            debited = Account.objects.filter(
+                pk=account_id, balance__gte=amount
+            ).update(balance=F('balance') - amount)
+        return bool(debited)
+
+    @staticmethod
+    def lock_accounts(
+        account_ids: list[int], credited: list[int] | None = None
+    ) -> list[int]:
+        # Rows are always locked in primary key order, so two transfers
+        # touching the same pair of accounts can not deadlock each other.
+        # Sharded accounts that are only credited are not locked at all.
+        return list(
+            Account.objects.select_for_update()
+            .filter(pk__in=account_ids)
+            .exclude(pk__in=credited or [], shard_count__gt=0)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    @staticmethod
+    def to_int(value: int | str) -> int:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise TypeError(value)
+        return int(value)
+
+    @staticmethod
+    def rejected(index: int, detail: str) -> dict:
+        return {'index': index, 'status': 'rejected', 'detail': detail}
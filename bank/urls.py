@@ -2,12 +2,23 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from bank import views
+from settings import settings
+
+if settings.async_views:
+    from bank.async_views import AsyncAccountViewSet as AccountViewSet, \
+        AsyncTransactionViewSet as TransactionViewSet
+else:
+    AccountViewSet = views.AccountViewSet
+    TransactionViewSet = views.TransactionViewSet
 
 router = DefaultRouter()
 router.register(
-    r'transactions', views.TransactionViewSet, basename="transaction"
+    r'transactions', TransactionViewSet, basename="transaction"
+)
+router.register(r'accounts', AccountViewSet, basename="account")
+router.register(
+    r'transfers', views.TransferRequestViewSet, basename="transfer"
 )
-router.register(r'accounts', views.AccountViewSet, basename="account")
 
 urlpatterns = [
     path('', include(router.urls)),
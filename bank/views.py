@@ -1,17 +1,33 @@
-from django.db.models import Q
-from django.http import QueryDict
-from rest_framework import viewsets, status, mixins
-from rest_framework.exceptions import APIException, PermissionDenied
+from datetime import datetime, timedelta
+from typing import ContextManager
+
+from django.http import QueryDict, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets, status, mixins, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ParseError, \
+    PermissionDenied
+from rest_framework.parsers import JSONParser
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from bank.models import Transaction, Account
+from bank.exports import TransactionExport
+from bank.idempotency import Idempotency, IdempotentReplay, idempotent
+from bank.ledger import Ledger
+from bank.models import Transaction, Account, TransferRequest
+from bank.pagination import TransactionCursorPagination
+from bank.parsers import NDJSONParser
 from bank.permissions import IsOwnerOrReadOnly
+from bank.replicas import Replicas
 from bank.serializers import TransactionSerializer, AccountSerializer, \
-    AccountPUTSerializer
+    AccountPUTSerializer, AccountValuesSerializer, \
+    TransactionValuesSerializer, TransferRequestSerializer
+from bank.transfers import TransferEngine
 from common.endpoints import EndPoints
 from services import rabbit_mq
+from settings import settings
 
 
 class NoPermission(APIException):
@@ -32,7 +48,81 @@ class IncorrectAmount(APIException):
     default_code = 'incorrect_amount'
 
 
+def parse_moment(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ParseError(f'Invalid datetime: {value}')
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class OwnedObjectMixin:
+
+    def get_object(self):
+        # IsOwnerOrReadOnly already loaded the object to check ownership.
+        owned_object = getattr(self.request, 'owned_object', None)
+        if not isinstance(owned_object, self.queryset.model):
+            return super().get_object()
+
+        self.check_object_permissions(self.request, owned_object)
+        return owned_object
+
+
+class ReplicaReadsMixin:
+    replica_actions = ('list', 'retrieve')
+
+    def replica_reads(self, request) -> ContextManager:
+        # self.action is only set once dispatch initialized the request.
+        action = self.action_map.get(request.method.lower())
+        return Replicas.reads(
+            self if action in self.replica_actions else None
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        with self.replica_reads(request):
+            return super().dispatch(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        auth_context = getattr(request, 'auth_context', None)
+        if (
+            auth_context is not None
+            and request.method not in permissions.SAFE_METHODS
+            and status.is_success(response.status_code)
+        ):
+            Replicas.pin(auth_context.user_id)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class IdempotentMixin:
+
+    def check_permissions(self, request: Request) -> None:
+        super().check_permissions(request)
+        self.replay(request)
+
+    @staticmethod
+    def replay(request: Request) -> None:
+        # Runs once the auth context is known, keys are scoped per user.
+        if request.method == 'POST':
+            Idempotency.replay(request)
+
+    def handle_exception(self, exc: Exception) -> Response:
+        if isinstance(exc, IdempotentReplay):
+            return exc.response
+        return super().handle_exception(exc)
+
+
 class TransactionViewSet(
+    ReplicaReadsMixin,
+    IdempotentMixin,
+    OwnedObjectMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
@@ -42,6 +132,7 @@ class TransactionViewSet(
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [IsOwnerOrReadOnly]
+    pagination_class = TransactionCursorPagination
 
     @rabbit_mq.query(EndPoints.GET_USER)
     def list(self, request, *args, **kwargs):
@@ -53,12 +144,20 @@ class TransactionViewSet(
             user_transactions = Transaction.objects.all()
         else:
             user_id = int(kwargs['user_id'])
-            user_transactions = Transaction.objects.filter(
-                Q(sender_id__user_id=user_id) | Q(recipient_id__user_id=user_id)
-            ).all()
-        serializer = self.get_serializer(user_transactions, many=True)
-        return Response(serializer.data)
+            account_ids = list(
+                Account.objects.filter(user_id=user_id)
+                .values_list('pk', flat=True)
+            )
+            user_transactions = Transaction.objects.history(account_ids)
+        page = self.paginate_queryset(
+            user_transactions.values(*TransactionValuesSerializer.fields)
+        )
+        serializer = TransactionValuesSerializer(
+            page, self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
 
+    @idempotent
     @rabbit_mq.query(EndPoints.GET_USER)
     def create(self, request: Request, *args, **kwargs):
         sender_id = request.data['sender_id']
@@ -80,11 +179,102 @@ class TransactionViewSet(
         if account.user_id != account_id:
             raise NoPermission()
 
+        if settings.async_transfers:
+            return self.accept(sender_id, recipient_id, amount)
         return super().create(request, *args, **kwargs)
 
+    def accept(
+        self, sender_id: int, recipient_id: int, amount: int
+    ) -> Response:
+        transfer_request = TransferEngine.enqueue(
+            sender_id, recipient_id, amount, rabbit_mq.publish
+        )
+        serializer = TransferRequestSerializer(
+            transfer_request, context=self.get_serializer_context()
+        )
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': serializer.data['url']}
+        )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        parser_classes=[JSONParser, NDJSONParser]
+    )
+    @idempotent
+    @rabbit_mq.query(EndPoints.GET_USER)
+    def bulk(self, request: Request, *args, **kwargs) -> Response:
+        if not isinstance(request.data, list):
+            raise ParseError('Expected a list of transfers')
+
+        results = TransferEngine.bulk_transfer(
+            int(kwargs['user_id']),
+            request.data,
+            settings.bulk_transfer_chunk_size
+        )
+        return Response(results)
+
+    @action(detail=False)
+    @rabbit_mq.query(EndPoints.GET_USER)
+    def export(self, request: Request, *args, **kwargs):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in TransactionExport.content_types:
+            raise ParseError(f'Unsupported output: {output}')
+
+        account_ids = request.query_params.getlist('account')
+        try:
+            account_ids = [int(account_id) for account_id in account_ids]
+        except ValueError:
+            raise ParseError('Account ids must be integers')
+
+        if not kwargs['is_super_permission']:
+            owned_ids = Account.objects.filter(
+                user_id=kwargs['user_id']
+            ).values_list('pk', flat=True)
+            if account_ids:
+                owned_ids = owned_ids.filter(pk__in=account_ids)
+            account_ids = list(owned_ids)
+        elif not account_ids:
+            account_ids = None
+
+        export = TransactionExport(
+            account_ids,
+            parse_moment(request.query_params.get('since')),
+            parse_moment(request.query_params.get('until')),
+            settings.export_chunk_size
+        )
+        return self.export_response(export, output)
+
+    @staticmethod
+    def export_response(
+        export: TransactionExport, output: str
+    ) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(
+            export.stream(output),
+            content_type=TransactionExport.content_types[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="transactions.{output}"'
+        )
+        return response
 
-class AccountViewSet(viewsets.ModelViewSet):
-    queryset = Account.objects.all()
+
+class TransferRequestViewSet(
+    OwnedObjectMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet
+):
+    queryset = TransferRequest.objects.all()
+    serializer_class = TransferRequestSerializer
+    permission_classes = [IsOwnerOrReadOnly]
+
+
+class AccountViewSet(
+    ReplicaReadsMixin, OwnedObjectMixin, viewsets.ModelViewSet
+):
+    queryset = Account.objects.with_balance()
     serializer_class = AccountSerializer
 
     permission_classes = [IsOwnerOrReadOnly]
@@ -124,14 +314,35 @@ class AccountViewSet(viewsets.ModelViewSet):
 
         is_super_permission = kwargs['is_super_permission']
         if is_super_permission:
-            user_accounts = Account.objects.all()
+            user_accounts = Account.objects.with_balance()
         else:
-            user_accounts = (
-                Account.objects.filter(user_id=kwargs['user_id']).all()
+            user_accounts = Account.objects.with_balance().filter(
+                user_id=kwargs['user_id']
             )
-        serializer = self.get_serializer(user_accounts, many=True)
+        rows = list(
+            user_accounts.order_by('pk')
+            .values(*AccountValuesSerializer.fields)
+        )
+        transaction_ids = Account.recent_transaction_ids(
+            [row['id'] for row in rows], settings.account_transactions_limit
+        )
+        serializer = AccountValuesSerializer(
+            rows, transaction_ids, self.get_serializer_context()
+        )
         return Response(serializer.data)
 
     @rabbit_mq.query(EndPoints.GET_USER)
     def update(self, request, *args, **kwargs):
         return super().update(request, *args, **kwargs)
+
+    @action(detail=True)
+    def statement(self, request: Request, *args, **kwargs) -> Response:
+        account = self.get_object()
+        until = (
+            parse_moment(request.query_params.get('until')) or timezone.now()
+        )
+        since = (
+            parse_moment(request.query_params.get('since'))
+            or until - timedelta(days=30)
+        )
+        return Response(Ledger.statement(account.pk, since, until))
@@ -5,3 +5,4 @@ class EndPoints:
     VALIDATE_ACTION = __main_service_name + 'user_handler_action'
     REFRESH_TOKEN = __main_service_name + 'refresh_access_token'
     IS_SUPER_PERMISSION = __main_service_name + 'user_super_permission'
+    AUTH_CONTEXT = __main_service_name + 'user_auth_context'
@@ -0,0 +1,121 @@
+import queue
+import threading
+from functools import partial
+from typing import Callable
+
+import psycopg2.extensions
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+Database = base.Database
+
+
+class ConnectionPool:
+    def __init__(self, size: int, timeout: float) -> None:
+        self.timeout = timeout
+        self.__idle: queue.LifoQueue[psycopg2.extensions.connection] = (
+            queue.LifoQueue()
+        )
+        self.__slots = threading.BoundedSemaphore(size)
+
+    def acquire(
+        self,
+        connect: Callable[[], psycopg2.extensions.connection],
+        health_check: bool
+    ) -> psycopg2.extensions.connection:
+        if not self.__slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError('No free database connection.')
+
+        try:
+            while True:
+                try:
+                    connection = self.__idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+
+                if self.is_usable(connection, health_check):
+                    return connection
+                connection.close()
+        except BaseException:
+            self.__slots.release()
+            raise
+
+    def release(
+        self, connection: psycopg2.extensions.connection, discard: bool
+    ) -> None:
+        try:
+            if discard or connection.closed:
+                connection.close()
+                return
+
+            # A connection closed inside atomic() still has its
+            # transaction open.
+            status = connection.get_transaction_status()
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                connection.close()
+                return
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            # atomic() turned autocommit off. Left off, the health check
+            # would open a transaction and Django's set_autocommit(True) on
+            # the next checkout would fail inside it.
+            if not connection.autocommit:
+                connection.autocommit = True
+            self.__idle.put(connection)
+        except Database.Error:
+            connection.close()
+        finally:
+            self.__slots.release()
+
+    @staticmethod
+    def is_usable(
+        connection: psycopg2.extensions.connection, health_check: bool
+    ) -> bool:
+        if connection.closed:
+            return False
+        if not health_check:
+            return True
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pools: dict[str, ConnectionPool] = {}
+    pools_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        with self.pools_lock:
+            pool = self.pools.get(self.alias)
+            if pool is None:
+                pool = self.pools[self.alias] = ConnectionPool(
+                    self.settings_dict['POOL_SIZE'],
+                    self.settings_dict['POOL_TIMEOUT']
+                )
+        return pool
+
+    @async_unsafe
+    def get_new_connection(
+        self, conn_params: dict
+    ) -> psycopg2.extensions.connection:
+        # Only opens a connection when the pool has no idle one.
+        connection = self.pool.acquire(
+            partial(super().get_new_connection, conn_params),
+            self.settings_dict['CONN_HEALTH_CHECKS']
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self) -> None:
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(
+                    self.connection, discard=self.errors_occurred
+                )
@@ -12,6 +12,10 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
+from settings import settings as service_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -73,16 +77,82 @@ WSGI_APPLICATION = 'fojin_bank_django.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
+if service_settings.sql_dialect == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': service_settings.sql_database,
+        }
+    }
+elif service_settings.sql_dialect == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': service_settings.sql_database,
+            'USER': service_settings.sql_user,
+            'PASSWORD': service_settings.sql_password,
+            'HOST': service_settings.sql_host,
+            'PORT': service_settings.sql_port,
+            'CONN_MAX_AGE': service_settings.sql_conn_max_age,
+            'CONN_HEALTH_CHECKS': service_settings.sql_conn_health_checks,
+        }
+    }
+    if service_settings.sql_pool_size:
+        # Connections go back to the pool at the end of every request.
+        DATABASES['default'].update({
+            'ENGINE': 'common.postgresql_pool',
+            'CONN_MAX_AGE': 0,
+            'POOL_SIZE': service_settings.sql_pool_size,
+            'POOL_TIMEOUT': service_settings.sql_pool_timeout,
+        })
+else:
+    raise ImproperlyConfigured(
+        f'Unknown SQL_DIALECT {service_settings.sql_dialect!r}'
+    )
+
+# Replicas share the primary's settings, SQL_REPLICAS lists their hosts,
+# or database files for sqlite.
+replica_field = 'NAME' if service_settings.sql_dialect == 'sqlite' else 'HOST'
+for index, replica in enumerate(service_settings.sql_replicas):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        replica_field: replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+if service_settings.sql_replicas:
+    DATABASE_ROUTERS = ['bank.replicas.ReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'fojin_bank_service',
-        'USER': 'postgres',
-        'PASSWORD': '73vlad73',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+if service_settings.redis_url is not None:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': service_settings.redis_url,
+    }
+if (
+    service_settings.auth_cache_alias is not None
+    and service_settings.auth_cache_alias not in CACHES
+):
+    raise ImproperlyConfigured(
+        f'AUTH_CACHE_ALIAS {service_settings.auth_cache_alias!r} is not a '
+        f'configured cache, the shared cache needs REDIS_URL'
+    )
+# A read-your-writes pin in a per-process cache is missed by every other
+# worker, so replicas need a cache all of them share.
+replica_cache = CACHES.get(service_settings.sql_replica_cache_alias or '')
+if service_settings.sql_replicas and (
+    replica_cache is None or replica_cache['BACKEND'].endswith('LocMemCache')
+):
+    raise ImproperlyConfigured(
+        'SQL_REPLICAS needs SQL_REPLICA_CACHE_ALIAS to name a shared '
+        'configured cache, such as shared with REDIS_URL'
+    )
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -1,6 +1,11 @@
 from settings import settings
 
+from .async_rabbitmq_manager import AsyncRabbitMQ
+from .auth_cache import AuthContextCache
+from .auth_resolver import AuthContextResolver
 from .rabbitmq_manager import RabbitMQ
+from .rpc_codec import get_codec
+from .rpc_policy import CircuitBreaker, RPCPolicy
 
 amqp_connection_string = (
     'amqp://{user}:{password}@{host}:{port}/'.format(
@@ -11,4 +16,42 @@ amqp_connection_string = (
     )
 )
 
-rabbit_mq = RabbitMQ(amqp_connection_string, settings.core_channel_number)
+auth_cache = AuthContextCache(
+    settings.auth_cache_size,
+    settings.auth_cache_ttl,
+    settings.auth_cache_alias
+)
+
+auth_resolver = AuthContextResolver(
+    auth_cache, settings.jwt_local_verification
+)
+
+rpc_policy = RPCPolicy(
+    settings.rpc_timeout,
+    settings.rpc_timeouts,
+    settings.rpc_request_timeout,
+    CircuitBreaker(
+        settings.rpc_failure_threshold,
+        settings.rpc_recovery_timeout
+    )
+)
+
+rpc_codec = get_codec(settings.rpc_codec)
+
+rabbit_mq = RabbitMQ(
+    amqp_connection_string,
+    settings.core_channel_number,
+    auth_resolver,
+    pool_size=settings.amqp_pool_size,
+    heartbeat=settings.amqp_heartbeat,
+    lease_timeout=settings.amqp_pool_timeout,
+    connect_retries=settings.amqp_connect_retries,
+    policy=rpc_policy,
+    codec=rpc_codec
+)
+async_rabbit_mq = AsyncRabbitMQ(
+    amqp_connection_string,
+    auth_resolver,
+    policy=rpc_policy,
+    codec=rpc_codec
+)
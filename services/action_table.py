@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db.models import Model
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.viewsets import ViewSetMixin
+
+from bank.models import Account, Transaction, TransferRequest
+from common.actions import PermissionActions
+from common.methods import HTTPMethods
+
+OwnerLookup = Callable[[int | None, str], Model | None]
+
+
+def own_account(user_id: int | None, pk: str) -> Account | None:
+    return Account.objects.with_balance().filter(
+        user_id=user_id, pk=pk
+    ).first()
+
+
+def own_transaction(user_id: int | None, pk: str) -> Transaction | None:
+    return Transaction.objects.for_user(user_id).filter(pk=pk).first()
+
+
+def own_transfer_request(
+    user_id: int | None, pk: str
+) -> TransferRequest | None:
+    return TransferRequest.objects.filter(
+        sender_id__user_id=user_id, pk=pk
+    ).first()
+
+
+@dataclass(frozen=True, slots=True)
+class ActionRule:
+    action: str
+    super_action: str | None = None
+    owner_lookup: OwnerLookup | None = None
+    foreign_action: str | None = None
+
+    @property
+    def actions(self) -> list[str]:
+        return [
+            action for action in (
+                self.action, self.super_action, self.foreign_action
+            )
+            if action is not None
+        ]
+
+    def resolve(self, request: Request, pk: str | None, **kwargs) -> str:
+        if kwargs['is_super_permission'] and self.super_action is not None:
+            return self.super_action
+        if self.owner_lookup is None:
+            return self.action
+
+        owned_object = self.owner_lookup(kwargs.get('user_id'), pk)
+        if owned_object is None:
+            return self.foreign_action
+        # Handed to get_object() so the view does not load it again.
+        request.owned_object = owned_object
+        return self.action
+
+
+def view_rules(create_action: str, owner_lookup: OwnerLookup) -> dict:
+    return {
+        (HTTPMethods.GET, False): ActionRule(
+            PermissionActions.VIEW_PROFILE,
+            super_action=PermissionActions.VIEW_ALL_PROFILES
+        ),
+        (HTTPMethods.GET, True): ActionRule(
+            PermissionActions.VIEW_PROFILE,
+            super_action=PermissionActions.VIEW_PROFILE,
+            owner_lookup=owner_lookup,
+            foreign_action=PermissionActions.VIEW_ALL_PROFILES
+        ),
+        (HTTPMethods.POST, False): ActionRule(create_action),
+        (HTTPMethods.POST, True): ActionRule(create_action)
+    }
+
+
+ACTION_TABLE: dict[tuple[str, str, bool], ActionRule] = {
+    (basename, method, has_pk): rule
+    for basename, rules in {
+        'account': {
+            **view_rules(PermissionActions.CREATE_ACCOUNT, own_account),
+            (HTTPMethods.PUT, False): ActionRule(
+                PermissionActions.ASSIGN_ADMINISTRATOR
+            ),
+            (HTTPMethods.PUT, True): ActionRule(
+                PermissionActions.ASSIGN_ADMINISTRATOR
+            )
+        },
+        'transaction': view_rules(
+            PermissionActions.CREATE_TRANSFER, own_transaction
+        ),
+        'transfer': {
+            (HTTPMethods.GET, True): ActionRule(
+                PermissionActions.VIEW_PROFILE,
+                super_action=PermissionActions.VIEW_PROFILE,
+                owner_lookup=own_transfer_request,
+                foreign_action=PermissionActions.VIEW_ALL_PROFILES
+            )
+        }
+    }.items()
+    for (method, has_pk), rule in rules.items()
+}
+
+CANDIDATE_ACTIONS: dict[tuple[str, str], list[str]] = {}
+for (basename, method, _), rule in ACTION_TABLE.items():
+    candidates = CANDIDATE_ACTIONS.setdefault((basename, method), [])
+    candidates.extend(
+        action for action in rule.actions if action not in candidates
+    )
+
+
+def request_pk(request: Request) -> str | None:
+    return request.parser_context.get('kwargs').get('pk')
+
+
+def get_candidate_actions(
+    request: Request, view: type[ViewSetMixin]
+) -> list[str]:
+    basename = getattr(view, 'basename', None)
+    return CANDIDATE_ACTIONS.get((basename, request.method), [])
+
+
+def get_action(request: Request, view: type[ViewSetMixin], **kwargs) -> str:
+    pk = request_pk(request)
+    key = (getattr(view, 'basename', None), request.method, pk is not None)
+    try:
+        rule = ACTION_TABLE[key]
+    except KeyError:
+        raise APIException(code=404)
+
+    return rule.resolve(request, pk, **kwargs)
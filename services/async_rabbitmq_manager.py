@@ -0,0 +1,140 @@
+import uuid
+from functools import wraps
+from typing import Any, Callable
+
+from asgiref.sync import sync_to_async
+from rest_framework import viewsets
+from rest_framework.request import Request
+from rest_framework.viewsets import ViewSetMixin
+
+from common.endpoints import EndPoints
+
+from .auth_context import AuthContext
+from .auth_resolver import AuthContextResolver
+from .rabbitmq_manager import RabbitError, RabbitMQ
+from .rpc_codec import Codec, JSONCodec
+from .rpc_policy import RPCPolicy
+from .rpc_transport import AsyncAMQPTransport, AsyncRPCTransport
+
+
+class AsyncRabbitMQ:
+    def __init__(
+        self,
+        connection_string: str,
+        resolver: AuthContextResolver | None = None,
+        policy: RPCPolicy | None = None,
+        transport: AsyncRPCTransport | None = None,
+        codec: Codec | None = None
+    ) -> None:
+        self.resolver = resolver or AuthContextResolver()
+        self.policy = policy or RPCPolicy()
+        self.codec = codec or JSONCodec()
+        self.transport = transport or AsyncAMQPTransport(connection_string)
+
+    def query(self, routing_key: str) -> Callable:
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            async def make_query(
+                instance: type[viewsets.ViewSet],
+                request: Request,
+                *args,
+                **kwargs
+            ) -> Any:
+                if routing_key == EndPoints.GET_USER:
+                    auth_context = await self.get_auth_context(request)
+                    return await function(
+                        instance, request, *args, **auth_context.as_kwargs()
+                    )
+
+                headers = RabbitMQ.authorization_headers(request)
+                auth_context = await self.get_auth_context(request)
+                body = self.codec.dumps(request.data)
+                status, answer = await self.call(
+                    routing_key,
+                    body,
+                    headers,
+                    self.policy.request_deadline(request)
+                )
+
+                if status:
+                    answer['is_super_permission'] = (
+                        auth_context.is_super_permission
+                    )
+                    return await function(instance, request, *args, **answer)
+                else:
+                    raise RabbitError(answer)
+
+            return make_query
+
+        return decorator
+
+    async def get_auth_context(
+        self, request: Request, view: type[ViewSetMixin] | None = None
+    ) -> AuthContext:
+        actions = (
+            RabbitMQ.get_candidate_actions(request, view)
+            if view is not None else []
+        )
+        headers = RabbitMQ.authorization_headers(request)
+        authorization = headers['Authorization']
+
+        auth_context, actions = self.resolver.lookup(
+            request, authorization, actions
+        )
+        if actions is None:
+            return auth_context
+
+        body = self.codec.dumps({'actions': actions})
+        status, answer = await self.call(
+            EndPoints.AUTH_CONTEXT,
+            body,
+            headers,
+            self.policy.request_deadline(request)
+        )
+        if not status:
+            raise RabbitError(answer)
+
+        return self.resolver.store(
+            request, authorization, answer, auth_context
+        )
+
+    async def validate_action(
+        self, request: Request, view: type[ViewSetMixin], **kwargs
+    ) -> bool:
+        auth_context = await self.get_auth_context(request, view)
+        if not RabbitMQ.is_method_allowed(request, auth_context):
+            return False
+
+        kwargs.update(auth_context.as_kwargs())
+        action = await sync_to_async(RabbitMQ.get_action)(
+            request, view, **kwargs
+        )
+        return RabbitMQ.check_action(action, auth_context)
+
+    async def call(
+        self,
+        routing_key: str,
+        body: bytes = b'',
+        headers: dict | None = None,
+        deadline: float | None = None
+    ) -> tuple[bool, Any]:
+        deadline = self.policy.call_deadline(routing_key, deadline)
+        with self.policy.breaker.guard():
+            reply, content_type = await self.transport.request(
+                routing_key,
+                body,
+                self.policy.deadline_headers(headers, deadline),
+                self.unique_message_id,
+                deadline,
+                self.codec.content_type
+            )
+
+        answer, status, _ = RabbitMQ.handle_delivery(reply, content_type)
+        return status, answer
+
+    @property
+    def unique_message_id(self) -> str:
+        return str(uuid.uuid4())
+
+    async def close(self) -> None:
+        await self.transport.close()
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import BaseCache, caches
+
+from .auth_context import AuthContext
+from .jwt_manager import JWTManager
+
+
+class AuthContextCache:
+    __key_prefix = 'auth_context:'
+
+    def __init__(
+        self, max_size: int, ttl: float, shared_alias: str | None = None
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.__entries: OrderedDict[str, tuple[float, AuthContext]] = (
+            OrderedDict()
+        )
+        self.__lock = threading.Lock()
+
+    @property
+    def shared(self) -> BaseCache | None:
+        if self.shared_alias is None:
+            return None
+        return caches[self.shared_alias]
+
+    def get(self, authorization: str) -> AuthContext | None:
+        key = self.make_key(authorization)
+        now = time.time()
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                expires_at, auth_context = entry
+                if expires_at > now:
+                    self.__entries.move_to_end(key)
+                    return auth_context
+                del self.__entries[key]
+
+        if self.shared is None:
+            return None
+
+        entry = self.shared.get(key)
+        if entry is None:
+            return None
+        expires_at, auth_context = entry
+        if expires_at <= now:
+            return None
+
+        self.store(key, expires_at, auth_context)
+        return auth_context
+
+    def set(self, authorization: str, auth_context: AuthContext) -> None:
+        key = self.make_key(authorization)
+        expires_at = time.time() + self.ttl
+        token_expires_at = JWTManager.get_expiration(authorization)
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+
+        timeout = expires_at - time.time()
+        if timeout <= 0:
+            return
+
+        self.store(key, expires_at, auth_context)
+        if self.shared is not None:
+            self.shared.set(key, (expires_at, auth_context), timeout=timeout)
+
+    def store(
+        self, key: str, expires_at: float, auth_context: AuthContext
+    ) -> None:
+        with self.__lock:
+            self.__entries[key] = (expires_at, auth_context)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    @classmethod
+    def make_key(cls, authorization: str) -> str:
+        digest = hashlib.sha256(authorization.encode('utf-8')).hexdigest()
+        return cls.__key_prefix + digest
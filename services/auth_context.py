@@ -0,0 +1,43 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class AuthContext:
+    user: dict
+    is_super_permission: bool
+    actions: dict[str, bool] = field(default_factory=dict)
+
+    @classmethod
+    def from_answer(cls, answer: dict) -> "AuthContext":
+        return cls(
+            user=answer.get('user') or {},
+            is_super_permission=bool(answer.get('is_super_permission')),
+            actions=answer.get('actions') or {}
+        )
+
+    @classmethod
+    def from_claims(
+        cls, claims: dict, actions: list[str]
+    ) -> "AuthContext | None":
+        if 'user_id' not in claims or 'is_super_permission' not in claims:
+            return None
+
+        permissions = claims.get('permissions')
+        if permissions is None and actions:
+            return None
+
+        return cls(
+            user={'user_id': claims['user_id']},
+            is_super_permission=bool(claims['is_super_permission']),
+            actions={action: action in permissions for action in actions}
+        )
+
+    @property
+    def user_id(self) -> int | None:
+        return self.user.get('user_id')
+
+    def covers(self, actions: list[str]) -> bool:
+        return all(action in self.actions for action in actions)
+
+    def as_kwargs(self) -> dict:
+        return {**self.user, 'is_super_permission': self.is_super_permission}
@@ -0,0 +1,60 @@
+from rest_framework.request import Request
+
+from .auth_cache import AuthContextCache
+from .auth_context import AuthContext
+from .jwt_manager import JWTManager
+
+
+class AuthContextResolver:
+    def __init__(
+        self,
+        auth_cache: AuthContextCache | None = None,
+        local_verification: bool = False
+    ) -> None:
+        self.auth_cache = auth_cache
+        self.local_verification = local_verification
+
+    def lookup(
+        self, request: Request, authorization: str, actions: list[str]
+    ) -> tuple[AuthContext | None, list[str] | None]:
+        auth_context: AuthContext | None = getattr(
+            request, 'auth_context', None
+        )
+        if auth_context is None and self.auth_cache is not None:
+            auth_context = self.auth_cache.get(authorization)
+        if auth_context is not None and auth_context.covers(actions):
+            request.auth_context = auth_context
+            return auth_context, None
+
+        if self.local_verification:
+            claims = JWTManager.verify_token(authorization)
+            if claims is not None:
+                local_context = AuthContext.from_claims(claims, actions)
+                if local_context is not None:
+                    request.auth_context = local_context
+                    return local_context, None
+
+        if auth_context is not None:
+            actions = [
+                action for action in actions
+                if action not in auth_context.actions
+            ]
+        return auth_context, actions
+
+    def store(
+        self,
+        request: Request,
+        authorization: str,
+        answer: dict,
+        auth_context: AuthContext | None = None
+    ) -> AuthContext:
+        resolved_context = AuthContext.from_answer(answer)
+        if auth_context is not None:
+            resolved_context.actions = {
+                **auth_context.actions, **resolved_context.actions
+            }
+
+        request.auth_context = resolved_context
+        if self.auth_cache is not None:
+            self.auth_cache.set(authorization, resolved_context)
+        return resolved_context
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from common.endpoints import EndPoints
+
+from .rabbitmq_pool import BrokerUnavailable
+from .rpc_codec import JSON_CONTENT_TYPE, codec_for
+from .rpc_policy import RPCTimeout
+from .rpc_transport import AsyncRPCTransport, RPCTransport
+
+
+class FakeCoreService:
+    def __init__(
+        self,
+        user: dict | None = None,
+        is_super_permission: bool = False,
+        actions: dict[str, bool] | None = None,
+        latency: float = 0
+    ) -> None:
+        self.user = user or {'user_id': 1}
+        self.is_super_permission = is_super_permission
+        self.actions = actions
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+
+        self.handlers: dict[str, Callable[[dict], tuple[bool, object]]] = {
+            EndPoints.GET_USER: self.get_user,
+            EndPoints.IS_SUPER_PERMISSION: self.super_permission,
+            EndPoints.VALIDATE_ACTION: self.handler_action,
+            EndPoints.AUTH_CONTEXT: self.auth_context
+        }
+
+    def handle(
+        self,
+        routing_key: str,
+        body: bytes,
+        message_id: str,
+        content_type: str | None = None
+    ) -> tuple[bytes, str]:
+        self.calls[routing_key] += 1
+        codec = codec_for(content_type)
+        handler = self.handlers.get(routing_key)
+        if handler is None:
+            status, answer = False, f'Unknown endpoint {routing_key}.'
+        else:
+            status, answer = handler(codec.loads(body) if body else {})
+
+        reply = {'answer': answer, 'status': status, 'message_id': message_id}
+        return codec.dumps(reply), codec.content_type
+
+    def is_allowed(self, action: str) -> bool:
+        if self.actions is None:
+            return True
+        return self.actions.get(action, False)
+
+    def get_user(self, data: dict) -> tuple[bool, object]:
+        return True, dict(self.user)
+
+    def super_permission(self, data: dict) -> tuple[bool, object]:
+        return True, self.is_super_permission
+
+    def handler_action(self, data: dict) -> tuple[bool, object]:
+        return True, self.is_allowed(data.get('action'))
+
+    def auth_context(self, data: dict) -> tuple[bool, object]:
+        return True, {
+            'user': dict(self.user),
+            'is_super_permission': self.is_super_permission,
+            'actions': {
+                action: self.is_allowed(action)
+                for action in data.get('actions', [])
+            }
+        }
+
+
+class InMemoryTransport(RPCTransport):
+    def __init__(
+        self,
+        service: FakeCoreService | None = None,
+        pool_size: int | None = None,
+        lease_timeout: float = 5
+    ) -> None:
+        self.service = service or FakeCoreService()
+        self.lease_timeout = lease_timeout
+        self.published: list[tuple[str, bytes, str]] = []
+        self.__slots = (
+            threading.BoundedSemaphore(pool_size)
+            if pool_size is not None else None
+        )
+
+    def request(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None,
+        message_id: str,
+        deadline: float,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> tuple[bytes, str | None]:
+        if self.__slots is None:
+            return self.answer(
+                routing_key, body, message_id, deadline, content_type
+            )
+
+        if not self.__slots.acquire(timeout=self.lease_timeout):
+            raise BrokerUnavailable('No free broker channel.')
+        try:
+            return self.answer(
+                routing_key, body, message_id, deadline, content_type
+            )
+        finally:
+            self.__slots.release()
+
+    def publish(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None = None,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> None:
+        self.published.append((routing_key, body, content_type))
+
+    def answer(
+        self,
+        routing_key: str,
+        body: bytes,
+        message_id: str,
+        deadline: float,
+        content_type: str
+    ) -> tuple[bytes, str | None]:
+        remaining = deadline - time.time()
+        if self.service.latency > remaining:
+            time.sleep(max(remaining, 0))
+            raise RPCTimeout()
+        if self.service.latency:
+            time.sleep(self.service.latency)
+
+        return self.service.handle(
+            routing_key, body, message_id, content_type
+        )
+
+
+class AsyncInMemoryTransport(AsyncRPCTransport):
+    def __init__(self, service: FakeCoreService | None = None) -> None:
+        self.service = service or FakeCoreService()
+
+    async def request(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None,
+        message_id: str,
+        deadline: float,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> tuple[bytes, str | None]:
+        remaining = deadline - time.time()
+        if self.service.latency > remaining:
+            await asyncio.sleep(max(remaining, 0))
+            raise RPCTimeout()
+        if self.service.latency:
+            await asyncio.sleep(self.service.latency)
+
+        return self.service.handle(
+            routing_key, body, message_id, content_type
+        )
@@ -52,3 +52,34 @@ class JWTManager:
             return None
 
         return payload
+
+    @staticmethod
+    def verify_token(authorization: str) -> dict | None:
+        try:
+            token_type, token = authorization.split(' ')
+        except ValueError:
+            return None
+        if token_type != 'Bearer':
+            return None
+
+        try:
+            return jwt.decode(
+                token,
+                settings.jwt_secret_key,
+                algorithms=[settings.jwt_algorithm]
+            )
+        except Exception:
+            return None
+
+    @staticmethod
+    def get_expiration(authorization: str) -> float | None:
+        try:
+            _, token = authorization.split(' ')
+            claims = jwt.get_unverified_claims(token)
+        except Exception:
+            return None
+
+        expiration = claims.get('exp')
+        if expiration is None:
+            return None
+        return float(expiration)
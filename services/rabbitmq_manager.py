@@ -1,4 +1,3 @@
-import json
 import uuid
 from dataclasses import dataclass
 from functools import wraps
@@ -6,18 +5,23 @@ from typing import Callable, Any
 
 import pika
 from django.contrib.auth.models import Permission
-from django.db.models import Q
-from pika.adapters.blocking_connection import BlockingChannel
 from rest_framework import viewsets
 from rest_framework.exceptions import APIException
 from rest_framework.request import Request
 from rest_framework.viewsets import ViewSetMixin
 
-from bank.models import Account, Transaction
 from common.actions import PermissionActions
 from common.endpoints import EndPoints
 from common.methods import HTTPMethods
 
+from . import action_table
+from .auth_context import AuthContext
+from .auth_resolver import AuthContextResolver
+from .rabbitmq_pool import ChannelPool
+from .rpc_codec import Codec, JSONCodec, codec_for
+from .rpc_policy import RPCPolicy
+from .rpc_transport import AMQPTransport, RPCTransport
+
 
 @dataclass(slots=True)
 class RabbitMQMethod:
@@ -38,14 +42,34 @@ class RabbitError(APIException):
 
 
 class RabbitMQ:
-    def __init__(self, connection_string: str, channel_number: int) -> None:
+    def __init__(
+        self,
+        connection_string: str,
+        channel_number: int,
+        resolver: AuthContextResolver | None = None,
+        pool_size: int = 8,
+        heartbeat: int = 60,
+        lease_timeout: float = 5,
+        connect_retries: int = 3,
+        policy: RPCPolicy | None = None,
+        transport: RPCTransport | None = None,
+        codec: Codec | None = None
+    ) -> None:
         self.parameters = pika.URLParameters(connection_string)
-        self.__channel_number = channel_number
-        self.__queue_name = 'bank_django_service'
-        self.__answers = {}
-
-        self.__connection: pika.BlockingConnection | None = None
-        self.__channel: BlockingChannel | None = None
+        self.parameters.heartbeat = heartbeat
+        self.resolver = resolver or AuthContextResolver()
+        self.policy = policy or RPCPolicy()
+        self.codec = codec or JSONCodec()
+
+        self.transport = transport or AMQPTransport(
+            ChannelPool(
+                self.parameters,
+                channel_number,
+                size=pool_size,
+                lease_timeout=lease_timeout,
+                connect_retries=connect_retries
+            )
+        )
 
     def query(self, routing_key: str) -> Callable:
         def decorator(function: Callable) -> Callable:
@@ -56,105 +80,86 @@ class RabbitMQ:
                 *args,
                 **kwargs
             ) -> Any:
-                try:
-                    headers = {
-                        'Authorization': request.META['HTTP_AUTHORIZATION']
-                    }
-                except KeyError:
-                    raise TokenNotProvided()
-                is_super_permission = self.is_super_permission(request)
-                body = json.dumps(request.data.copy()).encode('utf-8')
-                properties = self.build_properties(headers=headers)
-                self.publish_message(body, properties, routing_key=routing_key)
-
-                for method, _, body in self.channel.consume(self.__queue_name):
-                    self.channel.basic_ack(method.delivery_tag)
-                    answer, status, _ = self.handle_delivery(body)
-                    self.channel.cancel()
-                    answer['is_super_permission'] = is_super_permission
-
-                    if status:
-                        return function(instance, request, *args, **answer)
-                    else:
-                        raise RabbitError(answer)
+                if routing_key == EndPoints.GET_USER:
+                    auth_context = self.get_auth_context(request)
+                    return function(
+                        instance, request, *args, **auth_context.as_kwargs()
+                    )
+
+                headers = self.authorization_headers(request)
+                auth_context = self.get_auth_context(request)
+                body = self.codec.dumps(request.data)
+                status, answer = self.call(
+                    routing_key,
+                    body,
+                    headers,
+                    self.policy.request_deadline(request)
+                )
+
+                if status:
+                    answer['is_super_permission'] = (
+                        auth_context.is_super_permission
+                    )
+                    return function(instance, request, *args, **answer)
+                else:
+                    raise RabbitError(answer)
 
             return make_query
 
         return decorator
 
+    def get_auth_context(
+        self, request: Request, view: type[ViewSetMixin] | None = None
+    ) -> AuthContext:
+        actions = (
+            self.get_candidate_actions(request, view)
+            if view is not None else []
+        )
+        headers = self.authorization_headers(request)
+        authorization = headers['Authorization']
+
+        auth_context, actions = self.resolver.lookup(
+            request, authorization, actions
+        )
+        if actions is None:
+            return auth_context
+
+        body = self.codec.dumps({'actions': actions})
+        status, answer = self.call(
+            EndPoints.AUTH_CONTEXT,
+            body,
+            headers,
+            self.policy.request_deadline(request)
+        )
+        if not status:
+            raise RabbitError(answer)
+
+        return self.resolver.store(
+            request, authorization, answer, auth_context
+        )
+
+    @staticmethod
+    def get_candidate_actions(
+        request: Request, view: type[ViewSetMixin]
+    ) -> list[str]:
+        return action_table.get_candidate_actions(request, view)
+
     @staticmethod
     def get_action(
         request: Request,
         view: type[ViewSetMixin],
         **kwargs
     ) -> str:
-        # TODO
-        from bank.views import AccountViewSet, TransactionViewSet
-
-        method = request.method
-        is_super_permission = kwargs['is_super_permission']
-
-        # TODO Complete exceptions
-        if isinstance(view, AccountViewSet):
-            if method == HTTPMethods.GET:
-                pk = request.parser_context.get('kwargs').get('pk')
-                if pk is not None:
-                    if is_super_permission:
-                        return PermissionActions.VIEW_PROFILE
-                    user_id = kwargs.get('user_id')
-                    account = (
-                        Account.objects.filter(user_id=user_id, pk=pk).first()
-                    )
-                    if account is not None:
-                        return PermissionActions.VIEW_PROFILE
-                    return PermissionActions.VIEW_ALL_PROFILES
-
-                if is_super_permission:
-                    return PermissionActions.VIEW_ALL_PROFILES
-                return PermissionActions.VIEW_PROFILE
-            elif method == HTTPMethods.POST:
-                return PermissionActions.CREATE_ACCOUNT
-            elif method == HTTPMethods.PUT:
-                return PermissionActions.ASSIGN_ADMINISTRATOR
-            else:
-                raise APIException(code=404)
-        elif isinstance(view, TransactionViewSet):
-            if method == HTTPMethods.GET:
-                pk = request.parser_context.get('kwargs').get('pk')
-                if pk is not None:
-                    if is_super_permission:
-                        return PermissionActions.VIEW_PROFILE
-                    user_id = kwargs.get('user_id')
-                    transaction = Transaction.objects.filter(
-                        Q(sender_id__user_id=user_id)
-                        | Q(recipient_id__user_id=user_id),
-                        pk=pk
-                    ).first()
-                    if transaction is not None:
-                        return PermissionActions.VIEW_PROFILE
-                    return PermissionActions.VIEW_ALL_PROFILES
-
-                if is_super_permission:
-                    return PermissionActions.VIEW_ALL_PROFILES
-                return PermissionActions.VIEW_PROFILE
-            elif method == HTTPMethods.POST:
-                return PermissionActions.CREATE_TRANSFER
-            else:
-                raise APIException(code=404)
-        else:
-            raise APIException(code=404)
+        return action_table.get_action(request, view, **kwargs)
 
     def is_super_permission(self, request: Request) -> bool:
-        headers = {
-            'Authorization': request.META['HTTP_AUTHORIZATION']
-        }
-        unique_message_id = self.unique_message_id
-        properties = self.build_properties(headers, unique_message_id)
-        self.publish_message(
-            b'', properties, EndPoints.IS_SUPER_PERMISSION
+        headers = self.authorization_headers(request)
+        status, answer = self.call(
+            EndPoints.IS_SUPER_PERMISSION,
+            b'',
+            headers,
+            self.policy.request_deadline(request)
         )
-
-        status, answer = self.get_answer(request, unique_message_id)
         if not status:
             raise APIException(code=404, detail=str(answer))
 
@@ -163,90 +168,78 @@ class RabbitMQ:
     def validate_action(
         self, request: Request, view: type[ViewSetMixin], **kwargs
     ) -> bool:
-        is_super_permission = self.is_super_permission(request)
-        if (
-            is_super_permission
-            and request.method not in [HTTPMethods.GET, HTTPMethods.PUT]
-        ):
+        auth_context = self.get_auth_context(request, view)
+        if not self.is_method_allowed(request, auth_context):
             return False
 
-        kwargs['is_super_permission'] = is_super_permission
+        kwargs.update(auth_context.as_kwargs())
         action = self.get_action(request, view, **kwargs)
-        body = json.dumps({'action': action}).encode('utf-8')
-        unique_message_id = self.unique_message_id
-
-        headers = {
-            'Authorization': request.META['HTTP_AUTHORIZATION']
-        }
-        properties = self.build_properties(
-            headers, unique_message_id
-        )
-        self.publish_message(
-            body, properties, EndPoints.VALIDATE_ACTION
+        return self.check_action(action, auth_context)
+
+    @staticmethod
+    def is_method_allowed(request: Request, auth_context: AuthContext) -> bool:
+        return not (
+            auth_context.is_super_permission
+            and request.method not in [HTTPMethods.GET, HTTPMethods.PUT]
         )
 
-        status, answer = self.get_answer(request, unique_message_id)
+    @staticmethod
+    def check_action(action: str, auth_context: AuthContext) -> bool:
+        answer = auth_context.actions.get(action, False)
         if action == PermissionActions.CREATE_ACCOUNT:
-            if not status or not answer:
+            if not answer:
                 raise APIException(code=404, detail=str(answer))
 
         return answer
 
-    def get_answer(self, request: Request, unique_message_id: str):
-        for method, _, body in self.channel.consume(self.__queue_name):
-            self.channel.basic_ack(method.delivery_tag)
-            answer, status, message_id = self.handle_delivery(body)
-            self.channel.cancel()
-            if message_id != unique_message_id:
-                self.get_answer(request, message_id)
-
-            return status, answer
-
-    @property
-    def unique_message_id(self):
-        return str(uuid.uuid4())
-
-    def publish_message(
+    def call(
         self,
+        routing_key: str,
         body: bytes,
-        properties: pika.BasicProperties,
-        routing_key: str = None
-    ) -> None:
-        self.channel.basic_publish(
-            exchange='',
-            routing_key=routing_key,
-            body=body,
-            properties=properties,
-            mandatory=True
-        )
-
-    def build_properties(
-        self, headers: dict | None = None, message_id: str | None = None
-    ) -> pika.BasicProperties:
-        return pika.BasicProperties(
-            reply_to=self.__queue_name, headers=headers, message_id=message_id
-        )
+        headers: dict,
+        deadline: float | None = None
+    ) -> tuple[bool, Any]:
+        deadline = self.policy.call_deadline(routing_key, deadline)
+        with self.policy.breaker.guard():
+            reply, content_type = self.transport.request(
+                routing_key,
+                body,
+                self.policy.deadline_headers(headers, deadline),
+                self.unique_message_id,
+                deadline,
+                self.codec.content_type
+            )
 
-    @property
-    def connection(self) -> pika.BlockingConnection:
-        if self.__connection is None:
-            self.__connection = pika.BlockingConnection(self.parameters)
-        return self.__connection
+        answer, status, _ = self.handle_delivery(reply, content_type)
+        return status, answer
 
-    @property
-    def channel(self) -> BlockingChannel:
-        if self.__channel is None:
-            self.__channel = self.connection.channel(self.__channel_number)
-            self.__channel.queue_declare(
-                queue=self.__queue_name
+    def publish(
+        self, routing_key: str, payload: Any, headers: dict | None = None
+    ) -> None:
+        with self.policy.breaker.guard():
+            self.transport.publish(
+                routing_key,
+                self.codec.dumps(payload),
+                headers,
+                self.codec.content_type
             )
-            self.__channel.confirm_delivery()
 
-        return self.__channel
+    @staticmethod
+    def authorization_headers(request: Request) -> dict:
+        try:
+            return {'Authorization': request.META['HTTP_AUTHORIZATION']}
+        except KeyError:
+            raise TokenNotProvided()
+
+    @property
+    def unique_message_id(self):
+        return str(uuid.uuid4())
 
     @staticmethod
-    def handle_delivery(body: bytes) -> tuple[str | dict | bool, bool, str]:
-        body = json.loads(body.decode('utf-8'))
+    def handle_delivery(
+        body: bytes, content_type: str | None = None
+    ) -> tuple[str | dict | bool, bool, str]:
+        body = codec_for(content_type).loads(body)
         answer = body.get('answer')
         status = body.get('status')
         message_id = body.get('message_id')
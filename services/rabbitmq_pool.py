@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import pika
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import AMQPError
+from rest_framework.exceptions import APIException
+
+
+class BrokerUnavailable(APIException):
+    status_code = 503
+    default_detail = 'Core service is unavailable. Please try again later.'
+    default_code = 'broker_unavailable'
+
+
+class PooledChannel:
+    def __init__(
+        self, parameters: pika.ConnectionParameters, channel_number: int
+    ) -> None:
+        self.connection = pika.BlockingConnection(parameters)
+        self.channel: BlockingChannel = self.connection.channel(channel_number)
+        declare_ok = self.channel.queue_declare(
+            queue='', exclusive=True, auto_delete=True
+        )
+        self.reply_queue: str = declare_ok.method.queue
+        self.channel.confirm_delivery()
+
+    def is_healthy(self) -> bool:
+        if not self.connection.is_open or not self.channel.is_open:
+            return False
+
+        try:
+            # Services heartbeats that piled up while the channel was idle.
+            self.connection.process_data_events(time_limit=0)
+        except AMQPError:
+            return False
+        return self.channel.is_open
+
+    def close(self) -> None:
+        try:
+            if self.connection.is_open:
+                self.connection.close()
+        except AMQPError:
+            pass
+
+
+class ChannelPool:
+    def __init__(
+        self,
+        parameters: pika.ConnectionParameters,
+        channel_number: int,
+        size: int = 8,
+        lease_timeout: float = 5,
+        connect_retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2
+    ) -> None:
+        self.parameters = parameters
+        self.channel_number = channel_number
+        self.lease_timeout = lease_timeout
+        self.connect_retries = connect_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.__idle: queue.LifoQueue[PooledChannel] = queue.LifoQueue()
+        self.__slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def lease(self) -> Iterator[PooledChannel]:
+        if not self.__slots.acquire(timeout=self.lease_timeout):
+            raise BrokerUnavailable('No free broker channel.')
+
+        try:
+            pooled = self.acquire()
+            try:
+                yield pooled
+            except BaseException:
+                # The channel may hold unread replies or be half closed.
+                pooled.close()
+                raise
+            else:
+                self.__idle.put(pooled)
+        finally:
+            self.__slots.release()
+
+    def acquire(self) -> PooledChannel:
+        while True:
+            try:
+                pooled = self.__idle.get_nowait()
+            except queue.Empty:
+                return self.connect()
+
+            if pooled.is_healthy():
+                return pooled
+            pooled.close()
+
+    def connect(self) -> PooledChannel:
+        delay = self.backoff
+        for attempt in range(self.connect_retries + 1):
+            try:
+                return PooledChannel(self.parameters, self.channel_number)
+            except AMQPError:
+                if attempt == self.connect_retries:
+                    raise BrokerUnavailable()
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,96 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+
+class Codec(ABC):
+    name: str
+    content_type: str
+
+    @abstractmethod
+    def dumps(self, data: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def loads(self, body: bytes) -> Any:
+        pass
+
+
+class JSONCodec(Codec):
+    name = 'json'
+    content_type = JSON_CONTENT_TYPE
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, body: bytes) -> Any:
+        return json.loads(body)
+
+
+class ORJSONCodec(Codec):
+    name = 'orjson'
+    content_type = JSON_CONTENT_TYPE
+
+    def dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, body: bytes) -> Any:
+        return orjson.loads(body)
+
+
+class MsgPackCodec(Codec):
+    name = 'msgpack'
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def dumps(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, body: bytes) -> Any:
+        return msgpack.unpackb(body, raw=False)
+
+
+CODECS: dict[str, type[Codec]] = {
+    JSONCodec.name: JSONCodec,
+    ORJSONCodec.name: ORJSONCodec,
+    MsgPackCodec.name: MsgPackCodec
+}
+REQUIREMENTS = {ORJSONCodec.name: orjson, MsgPackCodec.name: msgpack}
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        codec_class = CODECS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f'Unknown RPC codec {name!r}.')
+
+    if name in REQUIREMENTS and REQUIREMENTS[name] is None:
+        raise ImproperlyConfigured(
+            f'RPC codec {name!r} requires the {name} package.'
+        )
+    return codec_class()
+
+
+# Replies are decoded by their own content type, JSON when none is set.
+json_codec = ORJSONCodec() if orjson is not None else JSONCodec()
+msgpack_codec = MsgPackCodec() if msgpack is not None else None
+
+
+def codec_for(content_type: str | None) -> Codec:
+    if content_type == MSGPACK_CONTENT_TYPE and msgpack_codec is not None:
+        return msgpack_codec
+    return json_codec
@@ -0,0 +1,123 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from .rabbitmq_pool import BrokerUnavailable
+
+
+class RPCTimeout(APIException):
+    status_code = 504
+    default_detail = 'Core service did not answer in time.'
+    default_code = 'rpc_timeout'
+
+
+class CircuitOpen(APIException):
+    status_code = 503
+    default_detail = 'Core service is unavailable. Please try again later.'
+    default_code = 'circuit_open'
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    failure_types = (RPCTimeout, BrokerUnavailable)
+
+    def __init__(
+        self, failure_threshold: int = 5, recovery_timeout: float = 30
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.__probing = False
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        self.before_call()
+        try:
+            yield
+        except self.failure_types:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.record_success()
+            raise
+        else:
+            self.record_success()
+
+    def before_call(self) -> None:
+        with self.__lock:
+            if self.state == self.CLOSED:
+                return
+
+            if self.state == self.OPEN:
+                if time.monotonic() < self.opened_at + self.recovery_timeout:
+                    raise CircuitOpen()
+                self.state = self.HALF_OPEN
+
+            # Half open: exactly one probe goes through, the rest fail fast.
+            if self.__probing:
+                raise CircuitOpen()
+            self.__probing = True
+
+    def record_success(self) -> None:
+        with self.__lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.__probing = False
+
+    def record_failure(self) -> None:
+        with self.__lock:
+            self.failures += 1
+            if (
+                self.state == self.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self.__probing = False
+
+
+@dataclass
+class RPCPolicy:
+    timeout: float = 5
+    timeouts: dict[str, float] = field(default_factory=dict)
+    request_timeout: float = 10
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+
+    def request_deadline(self, request: Request) -> float:
+        deadline = getattr(request, 'rpc_deadline', None)
+        if deadline is None:
+            deadline = time.time() + self.request_timeout
+            request.rpc_deadline = deadline
+        return deadline
+
+    def call_deadline(
+        self, routing_key: str, deadline: float | None = None
+    ) -> float:
+        now = time.time()
+        call_deadline = now + self.timeouts.get(routing_key, self.timeout)
+        if deadline is not None:
+            call_deadline = min(call_deadline, deadline)
+
+        if call_deadline <= now:
+            raise RPCTimeout('Request deadline exceeded.')
+        return call_deadline
+
+    @staticmethod
+    def deadline_headers(headers: dict | None, deadline: float) -> dict:
+        return {**(headers or {}), 'x-deadline': deadline}
+
+    @staticmethod
+    def expiration(deadline: float) -> str:
+        return str(max(int((deadline - time.time()) * 1000), 1))
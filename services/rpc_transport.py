@@ -0,0 +1,308 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+
+import aiormq
+import pika
+from aiormq.abc import AbstractChannel, AbstractConnection, DeliveredMessage
+from loguru import logger
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import AMQPError
+
+from .rabbitmq_pool import BrokerUnavailable, ChannelPool, PooledChannel
+from .rpc_codec import JSON_CONTENT_TYPE, codec_for
+from .rpc_policy import RPCPolicy, RPCTimeout
+
+
+class RPCTransport(ABC):
+    @abstractmethod
+    def request(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None,
+        message_id: str,
+        deadline: float,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> tuple[bytes, str | None]:
+        pass
+
+    @abstractmethod
+    def publish(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None = None,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncRPCTransport(ABC):
+    @abstractmethod
+    async def request(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None,
+        message_id: str,
+        deadline: float,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> tuple[bytes, str | None]:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class AMQPTransport(RPCTransport):
+    def __init__(self, pool: ChannelPool) -> None:
+        self.pool = pool
+        self.__declared_queues: set[str] = set()
+
+    def request(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None,
+        message_id: str,
+        deadline: float,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> tuple[bytes, str | None]:
+        try:
+            with self.pool.lease() as pooled:
+                properties = self.build_properties(
+                    headers,
+                    message_id,
+                    pooled.reply_queue,
+                    RPCPolicy.expiration(deadline),
+                    content_type
+                )
+                self.publish_message(
+                    body, properties, routing_key, channel=pooled.channel
+                )
+                return self.get_answer(pooled, message_id, deadline)
+        except AMQPError:
+            raise BrokerUnavailable()
+
+    def publish(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None = None,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> None:
+        properties = pika.BasicProperties(
+            content_type=content_type,
+            headers=headers,
+            delivery_mode=pika.DeliveryMode.Persistent
+        )
+        try:
+            with self.pool.lease() as pooled:
+                # The default exchange drops messages for a queue no
+                # consumer declared yet, so the publisher declares it too.
+                if routing_key not in self.__declared_queues:
+                    pooled.channel.queue_declare(routing_key, durable=True)
+                    self.__declared_queues.add(routing_key)
+                # Mandatory on a confirmed channel, an unroutable or
+                # nacked message raises instead of vanishing.
+                self.publish_message(
+                    body, properties, routing_key, channel=pooled.channel
+                )
+        except AMQPError as exc:
+            logger.warning(f'Publishing to {routing_key} failed: {exc!r}')
+            raise BrokerUnavailable()
+
+    def get_answer(
+        self,
+        pooled: PooledChannel,
+        unique_message_id: str,
+        deadline: float | None = None
+    ) -> tuple[bytes, str | None]:
+        channel = pooled.channel
+        inactivity_timeout = (
+            max(deadline - time.time(), 0) if deadline is not None else None
+        )
+        try:
+            for method, properties, body in channel.consume(
+                pooled.reply_queue, inactivity_timeout=inactivity_timeout
+            ):
+                if method is None:
+                    raise RPCTimeout()
+
+                channel.basic_ack(method.delivery_tag)
+                correlation_id = (
+                    properties.correlation_id
+                    or self.reply_message_id(body, properties.content_type)
+                )
+                # The reply queue is private to this channel, so any other
+                # reply is a late answer to an abandoned call.
+                if correlation_id != unique_message_id:
+                    if deadline is not None and time.time() >= deadline:
+                        raise RPCTimeout()
+                    continue
+
+                return body, properties.content_type
+        finally:
+            channel.cancel()
+
+    def publish_message(
+        self,
+        body: bytes,
+        properties: pika.BasicProperties,
+        routing_key: str = None,
+        exchange: str = '',
+        channel: BlockingChannel | None = None
+    ) -> None:
+        if channel is None:
+            with self.pool.lease() as pooled:
+                return self.publish_message(
+                    body, properties, routing_key, exchange, pooled.channel
+                )
+
+        channel.basic_publish(
+            exchange=exchange,
+            routing_key=routing_key,
+            body=body,
+            properties=properties,
+            mandatory=True
+        )
+
+    @staticmethod
+    def build_properties(
+        headers: dict | None = None,
+        message_id: str | None = None,
+        reply_to: str | None = None,
+        expiration: str | None = None,
+        content_type: str | None = None
+    ) -> pika.BasicProperties:
+        return pika.BasicProperties(
+            content_type=content_type,
+            reply_to=reply_to,
+            headers=headers,
+            message_id=message_id,
+            correlation_id=message_id,
+            expiration=expiration
+        )
+
+    @staticmethod
+    def reply_message_id(
+        body: bytes, content_type: str | None = None
+    ) -> str | None:
+        return codec_for(content_type).loads(body).get('message_id')
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class AsyncAMQPTransport(AsyncRPCTransport):
+    def __init__(self, connection_string: str) -> None:
+        self.connection_string = connection_string
+        self.__futures: dict[str, asyncio.Future] = {}
+        self.__reply_queue: str | None = None
+        self.__lock: asyncio.Lock | None = None
+
+        self.__connection: AbstractConnection | None = None
+        self.__channel: AbstractChannel | None = None
+
+    async def request(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None,
+        message_id: str,
+        deadline: float,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> tuple[bytes, str | None]:
+        try:
+            return await self.publish_and_wait(
+                routing_key, body, headers, message_id, deadline, content_type
+            )
+        except asyncio.TimeoutError:
+            raise RPCTimeout()
+        except (aiormq.AMQPError, ConnectionError):
+            raise BrokerUnavailable()
+
+    async def publish_and_wait(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict | None,
+        message_id: str,
+        deadline: float,
+        content_type: str = JSON_CONTENT_TYPE
+    ) -> tuple[bytes, str | None]:
+        channel = await self.channel()
+
+        future = asyncio.get_running_loop().create_future()
+        self.__futures[message_id] = future
+        properties = aiormq.spec.Basic.Properties(
+            content_type=content_type,
+            reply_to=self.__reply_queue,
+            correlation_id=message_id,
+            message_id=message_id,
+            headers=headers,
+            expiration=RPCPolicy.expiration(deadline)
+        )
+        try:
+            await channel.basic_publish(
+                body,
+                routing_key=routing_key,
+                properties=properties,
+                mandatory=True
+            )
+            message = await asyncio.wait_for(future, deadline - time.time())
+            return message.body, message.header.properties.content_type
+        finally:
+            self.__futures.pop(message_id, None)
+
+    async def on_response(self, message: DeliveredMessage) -> None:
+        properties = message.header.properties
+        correlation_id = properties.correlation_id
+        if correlation_id is None:
+            correlation_id = AMQPTransport.reply_message_id(
+                message.body, properties.content_type
+            )
+
+        future = self.__futures.pop(correlation_id, None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    async def channel(self) -> AbstractChannel:
+        if self.__channel is None or self.__channel.is_closed:
+            if self.__lock is None:
+                self.__lock = asyncio.Lock()
+            async with self.__lock:
+                if self.__channel is None or self.__channel.is_closed:
+                    await self.connect()
+
+        return self.__channel
+
+    async def connect(self) -> None:
+        if self.__connection is None or self.__connection.is_closed:
+            self.__connection = await aiormq.connect(self.connection_string)
+
+        channel = await self.__connection.channel()
+        declare_ok = await channel.queue_declare(
+            exclusive=True, auto_delete=True
+        )
+        await channel.basic_consume(
+            declare_ok.queue, self.on_response, no_ack=True
+        )
+
+        self.__reply_queue = declare_ok.queue
+        self.__channel = channel
+
+    async def close(self) -> None:
+        for future in self.__futures.values():
+            if not future.done():
+                future.cancel()
+        self.__futures.clear()
+
+        if self.__connection is not None and not self.__connection.is_closed:
+            await self.__connection.close()
+        self.__connection = None
+        self.__channel = None
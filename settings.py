@@ -15,6 +15,7 @@ class Settings(pydantic.BaseSettings):
 
     jwt_secret_key: str
     jwt_algorithm: str
+    jwt_local_verification: bool = False
 
     local_files_root: str
     docker_files_root: str
@@ -27,11 +28,56 @@ class Settings(pydantic.BaseSettings):
     sql_host: str
     sql_port: str
     sql_database: str
+    sql_conn_max_age: int = 60
+    sql_conn_health_checks: bool = True
+    sql_pool_size: int = 0
+    sql_pool_timeout: float = 5
+    sql_replicas: list[str] = []
+    sql_replica_sticky_seconds: float = 5
+    sql_replica_cache_alias: str | None = None
 
     amqp_user: str
     amqp_password: str
     amqp_host: str
     amqp_port: int
+    amqp_pool_size: int = 8
+    amqp_pool_timeout: float = 5
+    amqp_heartbeat: int = 60
+    amqp_connect_retries: int = 3
+
+    rpc_timeout: float = 5
+    rpc_timeouts: dict[str, float] = {}
+    rpc_request_timeout: float = 10
+    rpc_failure_threshold: int = 5
+    rpc_recovery_timeout: float = 30
+    rpc_codec: str = 'json'
+
+    redis_url: str | None = None
+
+    auth_cache_size: int = 1024
+    auth_cache_ttl: float = 30
+    auth_cache_alias: str | None = None
+
+    async_views: bool = False
+
+    bulk_transfer_chunk_size: int = 1000
+    async_transfers: bool = False
+    transfer_queue: str = 'bank_transfers'
+    settle_batch_size: int = 500
+    settle_batch_wait: float = 0.05
+    settle_recover_after: float = 30
+    account_transactions_limit: int = 10
+    export_chunk_size: int = 2000
+    export_spool_max_size: int = 8 * 1024 * 1024
+
+    idempotency_ttl: int = 86400
+    idempotency_lock_timeout: int = 60
+    idempotency_cache_size: int = 1024
+    idempotency_cache_ttl: float = 60
+
+    events_exchange: str = 'bank_events'
+    outbox_batch_size: int = 500
+    outbox_poll_interval: float = 0.5
 
     alembic_debug: bool = True
     auto_apply_migrations: bool = True